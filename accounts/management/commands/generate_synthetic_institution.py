@@ -0,0 +1,178 @@
+import datetime
+import random
+import string
+import time
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.contrib.auth.hashers import make_password
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+
+from core.models import Department, Classroom, Semester, Section, Subject
+from scheduler.models import TimeSlot, FixedSlot
+from faculty.models import Faculty, FacultyAvailability
+from timetable.models import TimetableVersion
+
+User = get_user_model()
+
+DAYS = ['monday', 'tuesday', 'wednesday', 'thursday', 'friday', 'saturday']
+EMAIL_DOMAIN = 'synthetic.college.edu'
+MAX_SLOTS_PER_DAY = 14
+
+
+class Command(BaseCommand):
+    help = 'Bulk-loads a reproducible synthetic institution for load and solver benchmarking'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--departments', type=int, default=5)
+        parser.add_argument('--semesters', type=int, default=4,
+                            help='Semesters running this cycle (numbered 1..N)')
+        parser.add_argument('--sections-per-semester', type=int, default=3,
+                            help='Sections per department and semester')
+        parser.add_argument('--subjects', type=int, default=5,
+                            help='Theory subjects per department and semester (plus one lab)')
+        parser.add_argument('--rooms', type=int, default=40)
+        parser.add_argument('--labs', type=int, default=10)
+        parser.add_argument('--faculty', type=int, default=60,
+                            help='Faculty members, spread evenly over the departments')
+        parser.add_argument('--slots-per-day', type=int, default=6,
+                            help='Teaching periods per day; a lunch break follows the fourth')
+        parser.add_argument('--days', type=int, default=5, choices=range(1, 7),
+                            help='Working days starting Monday')
+        parser.add_argument('--busy-rate', type=float, default=0.1,
+                            help='Share of faculty periods marked unavailable')
+        parser.add_argument('--seed', type=int, default=0)
+        parser.add_argument('--password', default='demo1234',
+                            help='Password given to every generated faculty account')
+        parser.add_argument('--clear', action='store_true',
+                            help='Delete ALL existing departments, rooms, slots, faculty and timetable rows first')
+
+    def handle(self, *args, **options):
+        if options['departments'] < 1 or options['faculty'] < options['departments']:
+            raise CommandError("Need at least one department and one faculty member per department.")
+        # Periods run hourly from 09:00 with a lunch hour after the fourth; the last must start before midnight
+        if not 1 <= options['slots_per_day'] <= MAX_SLOTS_PER_DAY:
+            raise CommandError(f"--slots-per-day must be between 1 and {MAX_SLOTS_PER_DAY}.")
+        if not options['clear'] and self._exists(options['departments']):
+            raise CommandError("Synthetic data from an earlier run already exists; "
+                               "rerun with --clear to replace it.")
+
+        started = time.monotonic()
+        rng = random.Random(options['seed'])
+        batch_size = getattr(settings, 'TIMETABLE_BULK_BATCH_SIZE', 500)
+
+        def bulk(model, objects):
+            return model.objects.bulk_create(objects, batch_size=batch_size)
+
+        with transaction.atomic():
+            if options['clear']:
+                self._clear()
+
+            # 1. Time slots: hourly periods from 09:00, lunch after the fourth
+            slots = []
+            for day in DAYS[:options['days']]:
+                hour = 9
+                for period in range(options['slots_per_day']):
+                    if period == 4:
+                        slots.append(TimeSlot(day=day, start_time=datetime.time(hour), end_time=datetime.time(hour, 45),
+                                              is_break=True, break_name='Lunch'))
+                        hour += 1
+                    slots.append(TimeSlot(day=day, start_time=datetime.time(hour), end_time=datetime.time(hour, 55)))
+                    hour += 1
+            TimeSlot.objects.bulk_create(slots, batch_size=batch_size, ignore_conflicts=True)
+            teaching_slots = [(slot.day, slot.start_time) for slot in slots if not slot.is_break]
+
+            # 2. Departments and semesters
+            departments = bulk(Department, [
+                Department(name=f"Synthetic Department {d + 1}", code=f"SD{d + 1:03d}")
+                for d in range(options['departments'])
+            ])
+            semesters = bulk(Semester, [
+                Semester(number=n, academic_year="2025-26") for n in range(1, options['semesters'] + 1)
+            ])
+
+            # 3. Rooms and labs
+            bulk(Classroom, [
+                Classroom(name=f"SYN-LH-{r + 1:04d}", capacity=rng.choice([40, 50, 60, 60, 70, 80]))
+                for r in range(options['rooms'])
+            ] + [
+                Classroom(name=f"SYN-LAB-{r + 1:04d}", capacity=rng.choice([60, 70, 80]), room_type='lab')
+                for r in range(options['labs'])
+            ])
+
+            # 4. Sections and subjects; theory quotas fill the week around a two-period lab
+            periods = len(teaching_slots)
+            theory_periods = max(periods - 2, options['subjects'])
+            sections, subjects = [], []
+            for department in departments:
+                for semester in semesters:
+                    for s in range(options['sections_per_semester']):
+                        sections.append(Section(
+                            name=_section_name(s), semester=semester, department=department,
+                            student_count=rng.randint(40, 70)
+                        ))
+                    for j in range(options['subjects']):
+                        quota = theory_periods // options['subjects'] + (j < theory_periods % options['subjects'])
+                        code = f"{department.code}-{semester.number}T{j + 1:02d}"
+                        subjects.append(Subject(
+                            name=f"Theory {semester.number}.{j + 1}", code=code, department=department,
+                            semester=semester, classes_per_week=quota
+                        ))
+                    subjects.append(Subject(
+                        name=f"Laboratory {semester.number}", code=f"{department.code}-{semester.number}L",
+                        department=department, semester=semester, subject_type='lab', classes_per_week=2
+                    ))
+            bulk(Section, sections)
+            bulk(Subject, subjects)
+
+            # 5. Faculty accounts: one password hash shared by every user
+            password = make_password(options['password'])
+            users = bulk(User, [
+                User(email=f"faculty{n + 1}@{EMAIL_DOMAIN}", role='faculty', password=password,
+                     is_active=True, is_verified=True)
+                for n in range(options['faculty'])
+            ])
+            faculty = bulk(Faculty, [
+                Faculty(user=user, department=departments[n % len(departments)],
+                        designation=rng.choice(['Professor', 'Associate Professor', 'Assistant Professor']),
+                        employee_id=f"SYN{n + 1:06d}")
+                for n, user in enumerate(users)
+            ])
+
+            # 6. Availability matrix: a random share of periods marked busy
+            busy = []
+            for member in faculty:
+                for day, start_time in teaching_slots:
+                    if rng.random() < options['busy_rate']:
+                        busy.append(FacultyAvailability(faculty=member, day=day, start_time=start_time))
+            bulk(FacultyAvailability, busy)
+
+        total = len(slots) + len(departments) + len(semesters) + options['rooms'] + options['labs'] \
+            + len(sections) + len(subjects) + len(users) + len(faculty) + len(busy)
+        self.stdout.write(self.style.SUCCESS(
+            f"Created {total} rows ({len(sections)} sections, {len(subjects)} subjects, "
+            f"{len(faculty)} faculty) in {time.monotonic() - started:.1f}s"
+        ))
+
+    def _exists(self, departments):
+        codes = [f"SD{d + 1:03d}" for d in range(departments)]
+        return (
+            Department.objects.filter(code__in=codes).exists()
+            or Classroom.objects.filter(name__startswith='SYN-').exists()
+            or Faculty.objects.filter(employee_id__startswith='SYN').exists()
+            or User.objects.filter(email__endswith=f"@{EMAIL_DOMAIN}").exists()
+        )
+
+    def _clear(self):
+        self.stdout.write(self.style.WARNING("Clearing existing academic data..."))
+        for model in (TimetableVersion, FixedSlot, FacultyAvailability, Faculty, Subject, Section,
+                      Semester, Classroom, Department, TimeSlot):
+            model.objects.all().delete()
+        User.objects.filter(email__endswith=f"@{EMAIL_DOMAIN}").delete()
+
+
+def _section_name(index):
+    """A, B, ..., Z, then A2, B2, ..."""
+    letter = string.ascii_uppercase[index % 26]
+    return letter if index < 26 else f"{letter}{index // 26 + 1}"
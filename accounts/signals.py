@@ -0,0 +1,19 @@
+from django.db.models.signals import post_save, post_delete
+
+from core.models import Department, Classroom, Section, Subject
+from faculty.models import Faculty
+from scheduler.models import TimeSlot
+from timetable.models import TimetableEntry
+from timetable.signals import timetable_published
+from .stats import invalidate_dashboard_stats
+
+# Everything the admin dashboard snapshot is derived from. Deleting any of
+# these cascades to the timetable entries that reference it, so entry
+# deletes are covered without a post_delete receiver on TimetableEntry
+# (which would turn off fast cascade deletes when old versions are pruned).
+for model in (Department, Classroom, Section, Subject, Faculty, TimeSlot):
+    post_save.connect(invalidate_dashboard_stats, sender=model, dispatch_uid=f'dashboard_stats_save_{model.__name__}')
+    post_delete.connect(invalidate_dashboard_stats, sender=model, dispatch_uid=f'dashboard_stats_delete_{model.__name__}')
+
+post_save.connect(invalidate_dashboard_stats, sender=TimetableEntry, dispatch_uid='dashboard_stats_save_TimetableEntry')
+timetable_published.connect(invalidate_dashboard_stats, dispatch_uid='dashboard_stats_published')
@@ -0,0 +1,72 @@
+"""
+Cached statistics for the admin dashboard.
+
+:func:`dashboard_stats` computes every count and chart series once into a
+snapshot stored in Django's cache and serves later loads from there.
+``accounts.signals`` drops the snapshot whenever one of the models it is
+derived from changes or a timetable version is published. The cache is
+shared between processes (see ``settings.CACHES``), so the timeout only
+bounds staleness after changes that send no signals, such as
+``QuerySet.update()``.
+"""
+from django.core.cache import cache
+from django.db.models import Count, Q
+
+from core.models import Department, Classroom, Section
+from faculty.models import Faculty
+from scheduler.models import TimeSlot
+from timetable.models import TimetableEntry
+
+DASHBOARD_STATS_KEY = 'accounts:admin_dashboard_stats'
+DASHBOARD_STATS_TIMEOUT = 5 * 60
+
+# 2 * PI * r for the r=80 utilization ring
+RING_LENGTH = 502.4
+
+
+def dashboard_stats():
+    """The admin dashboard's numbers as a dict, from the cache when possible."""
+    stats = cache.get(DASHBOARD_STATS_KEY)
+    if stats is None:
+        stats = _compute_stats()
+        cache.set(DASHBOARD_STATS_KEY, stats, DASHBOARD_STATS_TIMEOUT)
+    return stats
+
+
+def invalidate_dashboard_stats(**kwargs):
+    """Signal receiver: forget the snapshot so the next load recomputes it."""
+    cache.delete(DASHBOARD_STATS_KEY)
+
+
+def _compute_stats():
+    # Classes per department in one GROUP BY over the published timetable
+    per_department = dict(
+        TimetableEntry.objects.published()
+        .order_by()
+        .values_list('subject__department_id')
+        .annotate(count=Count('id'))
+    )
+    departments = list(Department.objects.values_list('id', 'code'))
+
+    # total slots = (Active TimeSlots - Breaks) * (Available Classrooms)
+    rooms = Classroom.objects.aggregate(total=Count('id'), available=Count('id', filter=Q(is_available=True)))
+    total_possible_slots = TimeSlot.objects.filter(is_break=False).count() * rooms['available']
+    actual_filled_slots = sum(per_department.values())
+
+    utilization_rate = 0
+    utilization_offset = RING_LENGTH  # Default: Full circle hidden
+    if total_possible_slots > 0:
+        utilization_rate = round((actual_filled_slots / total_possible_slots) * 100)
+        # Subtract the percentage portion to "show" the colored stroke
+        utilization_offset = RING_LENGTH - (RING_LENGTH * (utilization_rate / 100))
+
+    return {
+        'total_departments': len(departments),
+        'total_rooms': rooms['total'],
+        'total_faculty': Faculty.objects.count(),
+        'total_sections': Section.objects.count(),
+        'utilization_rate': utilization_rate,
+        'utilization_offset': utilization_offset,
+        'dept_names': [code for _, code in departments],
+        'dept_counts': [per_department.get(pk, 0) for pk, _ in departments],
+    }
@@ -1,3 +1,29 @@
+import io
+
+from django.core.management import call_command
+from django.core.management.base import CommandError
 from django.test import TestCase
 
-# Create your tests here.
+from core.models import Department
+
+SMALL = {'departments': 2, 'semesters': 1, 'sections_per_semester': 1, 'subjects': 2, 'rooms': 2, 'labs': 1,
+         'faculty': 2}
+
+
+class GenerateSyntheticInstitutionTests(TestCase):
+
+    def generate(self, **options):
+        call_command('generate_synthetic_institution', stdout=io.StringIO(), **{**SMALL, **options})
+
+    def test_second_run_needs_clear(self):
+        self.generate()
+
+        with self.assertRaisesMessage(CommandError, '--clear'):
+            self.generate()
+        self.generate(clear=True)
+        self.assertEqual(Department.objects.count(), 2)
+
+    def test_rejects_periods_past_midnight(self):
+        with self.assertRaisesMessage(CommandError, '--slots-per-day'):
+            self.generate(slots_per_day=15)
+        self.assertFalse(Department.objects.exists())
@@ -9,10 +9,9 @@ import random
 
 # Model Imports
 from .models import EmailOTP
-from core.models import Department, Classroom, Section
+from .stats import dashboard_stats
+from core.models import Department
 from timetable.models import TimetableEntry
-from faculty.models import Faculty
-from scheduler.models import TimeSlot
 
 User = get_user_model()
 
@@ -32,7 +31,7 @@ def login_view(request):
 
             login(request, user)
             user.login_count += 1
-            user.save()
+            user.save(update_fields=['login_count'])
             
             if user.role == 'admin':
                 return redirect('admin_dashboard')
@@ -112,48 +111,12 @@ def admin_dashboard(request):
     if request.user.role != 'admin':
         return redirect('user_dashboard')
 
-    # 1. Basic Counts
-    total_depts = Department.objects.count()
-    total_rooms = Classroom.objects.count()
-    total_faculty = Faculty.objects.count()
-    total_sections = Section.objects.count()
-
-    # 2. Aggregating data for Charts (Classes per Department)
-    dept_names = list(Department.objects.values_list('code', flat=True))
-    dept_class_counts = []
-    for dept_code in dept_names:
-        count = TimetableEntry.objects.filter(subject__department__code=dept_code).count()
-        dept_class_counts.append(count)
-
-    # 3. Room Utilization Logic (For the Circular Ring)
-    # total slots = (Active TimeSlots - Breaks) * (Available Classrooms)
-    active_timeslots = TimeSlot.objects.filter(is_break=False).count()
-    available_rooms = Classroom.objects.filter(is_available=True).count()
-    
-    total_possible_slots = active_timeslots * available_rooms
-    actual_filled_slots = TimetableEntry.objects.count()
-    
-    utilization_rate = 0
-    utilization_offset = 502.4  # Default: Full circle hidden (2 * PI * r=80)
-    
-    if total_possible_slots > 0:
-        utilization_rate = round((actual_filled_slots / total_possible_slots) * 100)
-        # Calculate SVG dash offset: 502.4 is 100%. 
-        # We subtract the percentage portion to "show" the colored stroke.
-        utilization_offset = 502.4 - (502.4 * (utilization_rate / 100))
-
-    context = {
-        'total_departments': total_depts,
-        'total_rooms': total_rooms,
-        'total_faculty': total_faculty,
-        'total_sections': total_sections,
-        'utilization_rate': utilization_rate,
-        'utilization_offset': utilization_offset,
-        'dept_names': dept_names,
-        'dept_counts': dept_class_counts,
-        'recent_activities': TimetableEntry.objects.order_by('-id')[:5],
+    # Counts and chart series come from a cached snapshot (see accounts.stats)
+    context = dict(dashboard_stats())
+    context.update({
+        'recent_activities': TimetableEntry.objects.published().order_by('-id')[:5],
         'recent_departments': Department.objects.all().order_by('-created_at')[:5],
-    }
+    })
     return render(request, 'accounts/admin_dashboard.html', context)
 
 @login_required
@@ -88,6 +88,20 @@ DATABASES = {
 }
 
 
+# Cache
+# https://docs.djangoproject.com/en/5.1/topics/cache/
+# Shared by every web and worker process, so an invalidation (rendered
+# timetables, dashboard figures) reaches all of them. The table is created
+# by the timetable migrations (or manage.py createcachetable).
+
+CACHES = {
+    'default': {
+        'BACKEND': 'django.core.cache.backends.db.DatabaseCache',
+        'LOCATION': 'django_cache',
+    }
+}
+
+
 # Password validation
 # https://docs.djangoproject.com/en/5.1/ref/settings/#auth-password-validators
 
@@ -136,6 +150,16 @@ DEFAULT_AUTO_FIELD = 'django.db.models.BigAutoField'
 
 AUTH_USER_MODEL = 'accounts.User'
 
+# Timetable Engine
+TIMETABLE_BULK_BATCH_SIZE = 500  # Rows per INSERT when saving a generated timetable
+TIMETABLE_GENERATION_WORKERS = 1  # >1 solves departments in parallel processes
+TIMETABLE_OPTIMIZE_SECONDS = 10  # Local-search budget after the greedy pass (0 disables it)
+TIMETABLE_RESULT_CACHE_SIZE = 20  # Solver results kept for re-use when the inputs have not changed
+TIMETABLE_VERSIONS_KEPT = 10  # Drafts and archived versions kept for review and rollback
+TIMETABLE_PROGRESS_INTERVAL = 1.0  # Minimum seconds between progress writes to a GenerationJob row
+TIMETABLE_JOB_TIMEOUT = 10 * 60  # Seconds without a progress write before a running job counts as dead
+TIMETABLE_RENDER_CACHE_SECONDS = 60 * 60  # Lifetime of cached timetable grids, pages and PDFs
+
 # UI Theme Constants 
 THEME_PRIMARY = "#1E3A8A"  # Deep Academic Blue
 THEME_SECONDARY = "#0D9488" # Teal Accent
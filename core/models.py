@@ -1,4 +1,7 @@
+from django.core.cache import cache
 from django.db import models
+from django.db.models import Count, ExpressionWrapper, F, FloatField, IntegerField, Q, Value
+from django.db.models.functions import Cast, Round
 from django.conf import settings
 
 class Department(models.Model):
@@ -11,6 +14,56 @@ class Department(models.Model):
 
 from django.db import models
 
+# Per-version room utilization. A saved version's entries only change when a
+# cascading delete (e.g. of a section) removes some, so a short expiry is enough.
+UTILIZATION_CACHE_SECONDS = 5 * 60
+
+
+class ClassroomQuerySet(models.QuerySet):
+    def with_utilization(self, version=None, total_slots=None):
+        """Annotate ``occupied_slots`` and ``utilization`` in one aggregated query.
+
+        Occupied slots are counted in ``version`` (default: published);
+        ``utilization`` is their share of the week's ``total_slots`` teaching
+        periods in percent. Pass ``total_slots`` to reuse a count already taken.
+        """
+        from timetable.models import TimetableVersion
+        from scheduler.models import TimeSlot
+
+        if version is None:
+            version = TimetableVersion.published()
+        if total_slots is None:
+            total_slots = TimeSlot.objects.filter(is_break=False).count()
+
+        rooms = self.annotate(occupied_slots=Count('timetableentry', filter=Q(timetableentry__version=version)))
+        if not total_slots:
+            return rooms.annotate(utilization=Value(0, output_field=IntegerField()))
+        percent = ExpressionWrapper(F('occupied_slots') * 100.0 / total_slots, output_field=FloatField())
+        return rooms.annotate(utilization=Cast(Round(percent), IntegerField()))
+
+
+def classroom_utilization():
+    """``{room pk: (occupied_slots, utilization)}`` for the published timetable.
+
+    The non-break slot count is taken once per call and the numbers are
+    cached per (timetable version, slot count).
+    """
+    from timetable.models import TimetableVersion
+    from scheduler.models import TimeSlot
+
+    version = TimetableVersion.published()
+    total_slots = TimeSlot.objects.filter(is_break=False).count()
+    key = f'classroom_utilization:{version.pk if version else 0}:{total_slots}'
+    utilization = cache.get(key)
+    if utilization is None:
+        rows = Classroom.objects.with_utilization(version, total_slots).values_list(
+            'pk', 'occupied_slots', 'utilization'
+        )
+        utilization = {pk: (occupied, percent) for pk, occupied, percent in rows}
+        cache.set(key, utilization, UTILIZATION_CACHE_SECONDS)
+    return utilization
+
+
 class Classroom(models.Model):
     ROOM_TYPES = [('classroom', 'Classroom'), ('lab', 'Laboratory')]
     
@@ -19,20 +72,21 @@ class Classroom(models.Model):
     room_type = models.CharField(max_length=20, choices=ROOM_TYPES, default='classroom')
     is_available = models.BooleanField(default=True)
 
+    objects = ClassroomQuerySet.as_manager()
+
     def __str__(self):
         return self.name
 
     # Dynamic Utilization Calculation
     def get_weekly_utilization(self):
-        """Calculates how many slots this specific room is occupied."""
-        from timetable.models import TimetableEntry
-        from scheduler.models import TimeSlot
-        
-        total_slots = TimeSlot.objects.filter(is_break=False).count()
-        occupied_slots = TimetableEntry.objects.filter(classroom=self).count()
-        
-        if total_slots == 0: return 0
-        return round((occupied_slots / total_slots) * 100)
+        """Calculates how many slots this specific room is occupied.
+
+        Rooms loaded through ``with_utilization()`` already carry the figure;
+        anything else reads the cached per-version numbers.
+        """
+        if hasattr(self, 'utilization'):
+            return self.utilization
+        return classroom_utilization().get(self.pk, (0, 0))[1]
 
 class Semester(models.Model):
     number = models.PositiveSmallIntegerField() # 1 to 8
@@ -1,3 +1,49 @@
+import datetime
+
+from django.contrib.auth import get_user_model
 from django.test import TestCase
+from django.urls import reverse
+
+from core.models import Department, Semester, Section, Subject, Classroom
+from scheduler.models import TimeSlot
+from timetable.models import TimetableEntry, TimetableVersion
+from .models import Faculty
+
+User = get_user_model()
+
+
+class FacultyDashboardTests(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        department = Department.objects.create(name="Computer Science", code="CSE")
+        semester = Semester.objects.create(number=1, academic_year="2025-26")
+        section = Section.objects.create(name="A", semester=semester, department=department, student_count=40)
+        subject = Subject.objects.create(name="Theory", code="CSE-T1", department=department, semester=semester)
+        room = Classroom.objects.create(name="LH-1", capacity=50)
+        cls.user = User.objects.create_user(email="teacher@example.com", password="x", role='faculty')
+        cls.faculty = Faculty.objects.create(user=cls.user, department=department, designation="Lecturer",
+                                             employee_id="T1", max_classes_per_day=1)
+
+        version = TimetableVersion.objects.create()
+        for day in ('monday', 'tuesday'):
+            for hour in (9, 10, 11):
+                slot = TimeSlot.objects.create(day=day, start_time=datetime.time(hour),
+                                               end_time=datetime.time(hour, 55))
+                if day == 'monday' and hour != 10:
+                    TimetableEntry.objects.create(version=version, day='Monday', timeslot=slot, subject=subject,
+                                                  classroom=room, section=section, faculty=cls.faculty)
+        version.publish()
+
+    def test_week_figures(self):
+        self.client.force_login(self.user)
+
+        response = self.client.get(reverse('user_dashboard'))
 
-# Create your tests here.
+        self.assertEqual(response.context['current_load'], 2)
+        self.assertEqual(response.context['idle_periods'], 1)
+        self.assertEqual(response.context['week_utilization'], 33)
+        self.assertEqual(response.context['week_days'], [{'name': 'Monday', 'classes': 2},
+                                                         {'name': 'Tuesday', 'classes': 0}])
+        self.assertEqual([row['cells'] for row in response.context['week_rows']], [[1, 0], [0, 0], [1, 0]])
+        self.assertContains(response, '2 / 1')  # over the daily limit
@@ -10,6 +10,7 @@ import datetime
 from .models import Faculty, FacultyAvailability
 from accounts.models import User
 from timetable.models import TimetableEntry
+from timetable.analytics import build_tensor, daily_load, heatmap, idle_gaps, utilization
 from scheduler.models import TimeSlot
 
 class FacultyListView(LoginRequiredMixin, ListView):
@@ -33,18 +34,34 @@ def faculty_dashboard(request):
         messages.warning(request, "Faculty profile not found. Please contact Admin.")
         return render(request, 'faculty/faculty_dashboard.html', {'faculty': None})
     
-    # 1. Fetch personal timetable entries
-    my_classes = TimetableEntry.objects.filter(faculty=faculty_profile).select_related('subject', 'classroom', 'timeslot')
-    
+    # 1. Fetch personal timetable entries once; every figure below is derived from them
+    my_classes = list(
+        TimetableEntry.objects.published().filter(faculty=faculty_profile)
+        .select_related('subject', 'classroom', 'section', 'timeslot')
+        .order_by('timeslot__start_time')
+    )
+
     # 2. Calculate Workload Stats
     limit = faculty_profile.max_classes_per_week or 20
-    current_load = my_classes.count()
+    current_load = len(my_classes)
     workload_percent = round((current_load / limit) * 100) if limit > 0 else 0
     workload_offset = 502.4 - (502.4 * (min(workload_percent, 100) / 100))
 
-    # 3. Organize "Today's Schedule"
-    day_name = datetime.datetime.now().strftime('%A').lower()
-    today_classes = my_classes.filter(day=day_name).order_by('timeslot__start_time')
+    # 3. Organize "Today's Schedule" (entries store the day's display name)
+    day_name = datetime.datetime.now().strftime('%A')
+    today_classes = [entry for entry in my_classes if entry.day == day_name]
+
+    # 4. Week at a glance: (day, period) arrays of this member's classes
+    tensor = build_tensor(my_classes)
+    week = heatmap(tensor.faculty)
+    per_day = daily_load(tensor.faculty).sum(axis=0)
+    days = [d for d in range(len(tensor.days)) if tensor.teaching[d].any()]
+    week_days = [{'name': tensor.days[d], 'classes': int(per_day[d])} for d in days]
+    # None marks a cell that is not a teaching period on that day
+    week_rows = [
+        {'time': period, 'cells': [int(week[d, p]) if tensor.teaching[d, p] else None for d in days]}
+        for p, period in enumerate(tensor.periods)
+    ]
 
     context = {
         'faculty': faculty_profile,
@@ -52,7 +69,13 @@ def faculty_dashboard(request):
         'today_classes': today_classes,
         'workload_percent': workload_percent,
         'workload_offset': workload_offset,
-        'total_subjects': my_classes.values('subject').distinct().count(),
+        'current_load': current_load,
+        'idle_periods': int(idle_gaps(tensor.faculty).sum()),
+        'week_utilization': round(float(utilization(tensor.faculty, tensor.teaching_periods).sum())),
+        'week_days': week_days,
+        'week_rows': week_rows,
+        'daily_limit': faculty_profile.max_classes_per_day,
+        'total_subjects': len({entry.subject_id for entry in my_classes}),
     }
     return render(request, 'faculty/faculty_dashboard.html', context)
 
@@ -1,3 +1,26 @@
 from django.contrib import admin
 
-# Register your models here.
+from accounts.stats import invalidate_dashboard_stats
+from .grid import bump_render_revision
+from .models import TimetableEntry
+
+
+@admin.register(TimetableEntry)
+class TimetableEntryAdmin(admin.ModelAdmin):
+    list_display = ('section', 'day', 'timeslot', 'subject', 'classroom', 'faculty', 'version', 'is_fixed')
+    list_filter = ('day', 'is_fixed')
+    list_select_related = ('section', 'timeslot', 'subject', 'classroom', 'faculty__user', 'version')
+    raw_id_fields = ('version', 'section', 'subject', 'classroom', 'faculty', 'timeslot')
+
+    # Entries have no post_delete receivers (they would turn off fast cascade
+    # deletes when old versions are pruned), so deletes made here drop the
+    # cached renderings and dashboard figures explicitly. Saves send post_save.
+    def delete_model(self, request, obj):
+        super().delete_model(request, obj)
+        bump_render_revision()
+        invalidate_dashboard_stats()
+
+    def delete_queryset(self, request, queryset):
+        super().delete_queryset(request, queryset)
+        bump_render_revision()
+        invalidate_dashboard_stats()
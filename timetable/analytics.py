@@ -0,0 +1,108 @@
+"""
+Vectorized timetable analytics.
+
+:func:`build_tensor` lays timetable entries the caller has already loaded
+out as dense NumPy arrays of class counts indexed by ``(resource, day,
+period)`` for sections, rooms and faculty. The reductions below
+(:func:`utilization`, :func:`daily_load`, :func:`idle_gaps`,
+:func:`heatmap`) are plain array arithmetic over those arrays, so a page
+costs its entry query plus one time-slot query however many figures it
+shows. A count above one in a cell is a clash.
+"""
+import numpy as np
+
+from scheduler.models import TimeSlot
+from .problem import DAYS
+
+
+class TimetableTensor:
+    """Dense per-resource views of a set of timetable entries.
+
+    ``sections``, ``rooms`` and ``faculty`` are ``int32`` arrays shaped
+    ``(n, len(days), len(periods))``; row ``i`` belongs to the database id
+    ``section_ids[i]`` (``room_ids``, ``faculty_ids``). Resources without
+    any class have no row. ``teaching`` is a boolean ``(days, periods)``
+    mask of the cells that are teaching periods.
+    """
+
+    def __init__(self, periods, teaching, rows):
+        self.days = DAYS
+        self.periods = periods
+        self.teaching = teaching
+
+        columns = np.array(rows, dtype=np.int64).reshape(-1, 5)
+        self.entry_count = len(columns)
+        section, room, faculty, day, period = columns.T
+        self.section_ids, self.sections = self._occupancy(section, day, period)
+        self.room_ids, self.rooms = self._occupancy(room, day, period)
+        self.faculty_ids, self.faculty = self._occupancy(faculty, day, period)
+
+    @property
+    def teaching_periods(self):
+        return int(self.teaching.sum())
+
+    def _occupancy(self, resource, day, period):
+        keep = resource >= 0
+        ids, index = np.unique(resource[keep], return_inverse=True)
+        grid = np.zeros((len(ids), len(self.days), len(self.periods)), dtype=np.int32)
+        np.add.at(grid, (index, day[keep], period[keep]), 1)
+        return ids, grid
+
+
+def build_tensor(entries):
+    """Lay out :class:`~timetable.models.TimetableEntry` objects as a :class:`TimetableTensor`.
+
+    ``entries`` should have ``timeslot`` selected; the only query is the
+    one for the week's teaching periods.
+    """
+    slots = list(TimeSlot.objects.filter(is_break=False).values_list('day', 'start_time'))
+    periods = sorted({start_time for _, start_time in slots})
+    period_index = {start_time: i for i, start_time in enumerate(periods)}
+    day_index = {day: i for i, day in enumerate(DAYS)}
+
+    # TimeSlot.day stores the choice value ('monday'), entries the display name
+    teaching = np.zeros((len(DAYS), len(periods)), dtype=bool)
+    for day, start_time in slots:
+        if day.capitalize() in day_index:
+            teaching[day_index[day.capitalize()], period_index[start_time]] = True
+
+    rows = []
+    for entry in entries:
+        start_time = entry.timeslot.start_time
+        if entry.day in day_index and start_time in period_index:
+            rows.append((entry.section_id, _pk(entry.classroom_id), _pk(entry.faculty_id),
+                         day_index[entry.day], period_index[start_time]))
+    return TimetableTensor(periods, teaching, rows)
+
+
+def _pk(value):
+    return -1 if value is None else value
+
+
+# -- reductions over (resource, day, period) arrays ---------------------------
+
+def utilization(grid, teaching_periods):
+    """Percentage of the week's teaching periods each resource is in use."""
+    if not teaching_periods:
+        return np.zeros(len(grid))
+    return 100.0 * (grid > 0).sum(axis=(1, 2)) / teaching_periods
+
+
+def daily_load(grid):
+    """Classes per resource and day, shaped ``(n, days)``."""
+    return grid.sum(axis=2)
+
+
+def idle_gaps(grid):
+    """Free periods between the first and last class of each resource and day."""
+    busy = grid > 0
+    n_periods = busy.shape[2]
+    first = busy.argmax(axis=2)
+    last = n_periods - 1 - busy[:, :, ::-1].argmax(axis=2)
+    span = last - first + 1 - busy.sum(axis=2)
+    return np.where(busy.any(axis=2), span, 0)
+
+
+def heatmap(grid):
+    """Classes per ``(day, period)`` summed over every resource."""
+    return grid.sum(axis=0)
@@ -0,0 +1,211 @@
+"""
+Constraint pipeline for the timetable solver.
+
+Every ``ConstraintRule.rule_type`` maps to a checker class registered with
+:func:`register`. At solve time :func:`active_rules` reads the
+``ConstraintRule`` table once: every checker is enforced as ``HARD`` unless a
+row marks its rule type as not mandatory, which downgrades it to ``SOFT``.
+Opt-in checkers (``default_weight = None``) are only enforced when a row
+names them. :func:`build_constraints` instantiates the active checkers only,
+so an inactive rule costs nothing in the search loop.
+
+A checker keeps its own counters and is updated incrementally:
+``delta(assignment, sign)`` books (``sign=1``) or releases (``sign=-1``) one
+``(section, subject, room, faculty, cell)`` placement and returns the change
+in weighted violations. Adding a rule means writing one class here and
+adding its choice to ``ConstraintRule.RULE_TYPES``.
+"""
+from array import array
+
+from scheduler.models import ConstraintRule
+
+HARD = 100
+SOFT = 1
+
+CONSTRAINTS = {}
+
+
+def register(rule_type):
+    """Class decorator mapping ``rule_type`` to a checker."""
+    def decorator(cls):
+        cls.rule_type = rule_type
+        CONSTRAINTS[rule_type] = cls
+        return cls
+    return decorator
+
+
+def active_rules():
+    """``{rule_type: weight}`` for the rules to enforce.
+
+    A rule type without a ``ConstraintRule`` row gets its checker's
+    ``default_weight``; rows override it with ``HARD`` when mandatory and
+    ``SOFT`` otherwise (the strongest row wins). Adding a row for one rule
+    never changes how the others are weighted.
+    """
+    configured = {}
+    for rule_type, is_mandatory in ConstraintRule.objects.values_list('rule_type', 'is_mandatory'):
+        if rule_type in CONSTRAINTS:
+            weight = HARD if is_mandatory else SOFT
+            configured[rule_type] = max(weight, configured.get(rule_type, 0))
+
+    rules = {}
+    for rule_type, checker in CONSTRAINTS.items():
+        weight = configured.get(rule_type, checker.default_weight)
+        if weight:
+            rules[rule_type] = weight
+    return rules
+
+
+def build_constraints(problem):
+    """Instantiate the problem's active checkers with kept and fixed placements booked."""
+    constraints = [CONSTRAINTS[rule_type](problem, weight) for rule_type, weight in problem.rules.items()]
+    for placements in (problem.kept, problem.fixed):
+        for assignment in placements:
+            for constraint in constraints:
+                constraint.delta(assignment)
+    return constraints
+
+
+class Constraint:
+    """Base class for checkers.
+
+    ``structural`` checkers are already guaranteed by the greedy pass
+    (occupancy and the room eligibility index); the greedy pass only screens
+    its candidates against the other hard rules. ``default_weight`` applies
+    when no ``ConstraintRule`` row configures the rule; ``None`` makes the
+    checker opt-in.
+    """
+
+    rule_type = None
+    structural = False
+    default_weight = HARD
+
+    def __init__(self, problem, weight):
+        self.problem = problem
+        self.weight = weight
+
+    def delta(self, assignment, sign=1):
+        raise NotImplementedError
+
+    def violated(self, assignment):
+        """Whether a booked ``assignment`` currently breaks the rule."""
+        raise NotImplementedError
+
+    def admits(self, assignment):
+        """Whether booking ``assignment`` would add no violation."""
+        raise NotImplementedError
+
+
+class _ResourceClash(Constraint):
+    """At most one booking of a resource per cell."""
+
+    structural = True
+
+    def __init__(self, problem, weight):
+        super().__init__(problem, weight)
+        self.n = len(self._resources(problem))
+        self.load = array('i', bytes(4 * problem.n_cells * self.n))
+
+    def _resources(self, problem):
+        raise NotImplementedError
+
+    def _resource(self, assignment):
+        raise NotImplementedError
+
+    def delta(self, assignment, sign=1):
+        resource = self._resource(assignment)
+        if resource < 0:
+            return 0
+        key = assignment[4] * self.n + resource
+        if sign > 0:
+            self.load[key] += 1
+            return self.weight if self.load[key] > 1 else 0
+        self.load[key] -= 1
+        return -self.weight if self.load[key] else 0
+
+    def violated(self, assignment):
+        resource = self._resource(assignment)
+        return resource >= 0 and self.load[assignment[4] * self.n + resource] > 1
+
+    def admits(self, assignment):
+        resource = self._resource(assignment)
+        return resource < 0 or not self.load[assignment[4] * self.n + resource]
+
+
+@register('room_clash')
+class RoomClash(_ResourceClash):
+
+    def _resources(self, problem):
+        return problem.room_ids
+
+    def _resource(self, assignment):
+        return assignment[2]
+
+
+@register('faculty_clash')
+class FacultyClash(_ResourceClash):
+
+    def _resources(self, problem):
+        return problem.faculty_ids
+
+    def _resource(self, assignment):
+        return assignment[3]
+
+
+@register('capacity_check')
+class CapacityCheck(Constraint):
+    """The room seats the whole section."""
+
+    structural = True
+
+    def admits(self, assignment):
+        section, _, room, _, _ = assignment
+        return room < 0 or self.problem.room_capacity[room] >= self.problem.section_size[section]
+
+    def violated(self, assignment):
+        return not self.admits(assignment)
+
+    def delta(self, assignment, sign=1):
+        return 0 if self.admits(assignment) else sign * self.weight
+
+
+@register('lab_timing')
+class LabTiming(Constraint):
+    """At most one lab session per section per day.
+
+    The model only names this rule ("Lab Timing Constraint"). This reading
+    spreads a section's labs over the week but rules out two-period lab
+    blocks, which many institutions schedule, so it is opt-in: it is only
+    enforced when a ``ConstraintRule`` row asks for it.
+    """
+
+    default_weight = None
+
+    def __init__(self, problem, weight):
+        super().__init__(problem, weight)
+        self.n_days = len(problem.day_cells)
+        self.labs = array('i', bytes(4 * len(problem.section_ids) * self.n_days))  # section * n_days + day
+
+    def _key(self, assignment):
+        section, subject, _, _, cell = assignment
+        if not self.problem.subject_is_lab[subject]:
+            return -1
+        return section * self.n_days + self.problem.cell_day_index[cell]
+
+    def delta(self, assignment, sign=1):
+        key = self._key(assignment)
+        if key < 0:
+            return 0
+        if sign > 0:
+            self.labs[key] += 1
+            return self.weight if self.labs[key] > 1 else 0
+        self.labs[key] -= 1
+        return -self.weight if self.labs[key] else 0
+
+    def violated(self, assignment):
+        key = self._key(assignment)
+        return key >= 0 and self.labs[key] > 1
+
+    def admits(self, assignment):
+        key = self._key(assignment)
+        return key < 0 or not self.labs[key]
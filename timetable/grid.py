@@ -0,0 +1,94 @@
+"""
+Ready-to-render weekly grids and the cache keys for rendered timetables.
+
+:func:`grid_rows` picks the entry shown in each cell of one version
+(optionally one section) in SQL, loads just those with their subject, room,
+faculty and time slot in one joined query and lays them out as rows of
+cells, so templates only loop. Rendered output is
+cached under :func:`render_cache_key`, which combines the version, the
+section and a render revision. A version's entries are never rewritten, so
+only edits to what a cell displays (subjects, rooms, sections, time
+slots...) have to invalidate anything; ``timetable.receivers`` bumps the
+revision for those. The revision is the time of the last bump, so together
+with the version it also gives :func:`last_modified` for conditional GETs.
+It lives in the default cache, which ``settings.CACHES`` shares between all
+processes, so a bump anywhere changes the keys, ETags and Last-Modified
+every process serves.
+"""
+import datetime
+import time
+
+from django.core.cache import cache
+from django.db.models import Max
+
+from scheduler.models import TimeSlot
+from .models import TimetableEntry
+
+DAYS = ['Monday', 'Tuesday', 'Wednesday', 'Thursday', 'Friday', 'Saturday']
+
+RENDER_REVISION_KEY = 'timetable:render_revision'
+
+
+def grid_rows(version, section_id=None):
+    """``[{'slot': {...}, 'cells': [entry or None per day in DAYS]}]`` by start time.
+
+    Rows are the distinct ``(start_time, end_time, is_break, break_name)``
+    time slots; when several entries share a cell (the all-sections view)
+    the last one by id is shown. That entry is chosen with a ``GROUP BY``
+    over the slot index, so only one row per cell is joined and loaded
+    however many sections the version holds.
+    """
+    slots = list(
+        TimeSlot.objects
+        .order_by('start_time')
+        .values('start_time', 'end_time', 'is_break', 'break_name')
+        .distinct()
+    )
+
+    cells = {}
+    if version is not None:
+        shown = TimetableEntry.objects.filter(version=version)
+        if section_id:
+            shown = shown.filter(section_id=section_id)
+        shown = shown.order_by().values('day', 'timeslot_id').annotate(last=Max('id')).values('last')
+        entries = (
+            TimetableEntry.objects
+            .filter(id__in=shown)
+            .select_related('subject', 'classroom', 'faculty__user', 'timeslot')
+            .order_by('id')
+        )
+        for entry in entries:
+            cells[(entry.day, entry.timeslot.start_time)] = entry
+
+    return [
+        {'slot': slot, 'cells': [cells.get((day, slot['start_time'])) for day in DAYS]}
+        for slot in slots
+    ]
+
+
+def render_revision():
+    """Nanosecond timestamp of the last change to anything a rendering shows."""
+    revision = cache.get(RENDER_REVISION_KEY)
+    if revision is None:
+        revision = bump_render_revision()
+    return revision
+
+
+def render_cache_key(kind, version, section_id=None):
+    """Cache key for one rendering (``kind``) of ``version`` and ``section_id``."""
+    return f"timetable:{kind}:{render_revision()}:{version.pk if version else 0}:{section_id or 'all'}"
+
+
+def last_modified(version):
+    """When a rendering of ``version`` last changed: publication or the last revision bump."""
+    changed = datetime.datetime.fromtimestamp(render_revision() / 1e9, tz=datetime.timezone.utc)
+    if version is not None:
+        changed = max(changed, version.published_at or version.created_at)
+    return changed
+
+
+def bump_render_revision(**kwargs):
+    """Signal receiver: make every cached rendering stale at once."""
+    revision = time.time_ns()
+    cache.set(RENDER_REVISION_KEY, revision, None)
+    return revision
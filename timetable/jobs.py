@@ -0,0 +1,151 @@
+"""
+Database-backed queue for timetable generation.
+
+The generate view only enqueues a :class:`GenerationJob`; the
+``run_generation_worker`` management command claims queued jobs one at a
+time, runs the solver and records its progress on the job row so the
+status endpoint and the event stream can report it. Progress is written
+at most every ``TIMETABLE_PROGRESS_INTERVAL`` seconds (and on every phase
+change), so reporting costs a handful of UPDATEs however large the run.
+Each job saves a draft
+:class:`~timetable.models.TimetableVersion`; the published timetable only
+changes when an admin publishes it. A worker that dies mid-run leaves its
+job ``running``; once it has not been updated for ``TIMETABLE_JOB_TIMEOUT``
+seconds :func:`active_jobs` no longer counts it, and :func:`fail_stale_jobs`
+marks it failed when a worker starts or claims the next job.
+"""
+import datetime
+import time
+
+from django.conf import settings
+from django.db import transaction
+from django.db.models import Q
+from django.utils import timezone
+
+from .models import GenerationJob
+from .validation import validate_timetable
+from . import solver
+
+
+def enqueue(user=None, section=None, department=None, time_limit=None, force=False, repair=False):
+    return GenerationJob.objects.create(
+        requested_by=user, section=section, department=department, time_limit=time_limit, force=force,
+        repair=repair
+    )
+
+
+def claim_next_job():
+    """Atomically move the oldest queued job to ``running`` and return it.
+
+    The conditional UPDATE makes claiming safe when several workers poll
+    the same table: only one of them will see a row count of 1. An idle
+    poll is a single read; abandoned jobs are only failed once there is a
+    job to claim.
+    """
+    job = GenerationJob.objects.filter(status='queued').order_by('created_at').first()
+    if job is None:
+        return None
+    fail_stale_jobs()
+    with transaction.atomic():
+        now = timezone.now()
+        claimed = GenerationJob.objects.filter(pk=job.pk, status='queued').update(
+            status='running', phase='loading', started_at=now, updated_at=now
+        )
+    if not claimed:
+        return None
+    job.refresh_from_db()
+    return job
+
+
+def _stale_cutoff(now):
+    return now - datetime.timedelta(seconds=getattr(settings, 'TIMETABLE_JOB_TIMEOUT', 600))
+
+
+def _stale(cutoff):
+    return Q(updated_at__lt=cutoff) | Q(updated_at__isnull=True, started_at__lt=cutoff)
+
+
+def active_jobs():
+    """Queued jobs and running jobs whose worker is still writing progress."""
+    return GenerationJob.objects.filter(status__in=['queued', 'running']).exclude(
+        Q(status='running') & _stale(_stale_cutoff(timezone.now()))
+    )
+
+
+def fail_stale_jobs():
+    """Fail ``running`` jobs whose worker stopped writing progress; return how many.
+
+    A worker killed mid-run (out of memory, a deploy restart) never finishes
+    its job, which would otherwise stay ``running`` and show as active on
+    the generate page forever. A live run writes progress every few seconds
+    while solving and optimizing, so ``TIMETABLE_JOB_TIMEOUT`` of silence
+    means its worker is gone.
+    """
+    now = timezone.now()
+    return GenerationJob.objects.filter(_stale(_stale_cutoff(now)), status='running').update(
+        status='failed', phase='failed', finished_at=now, updated_at=now,
+        message="The worker stopped responding; the job was abandoned. Queue it again to retry."
+    )
+
+
+def run_job(job, workers=None):
+    """Generate and save a timetable, recording progress on ``job``."""
+
+    interval = getattr(settings, 'TIMETABLE_PROGRESS_INTERVAL', 1.0)
+    budget = job.time_limit if job.time_limit is not None else getattr(settings, 'TIMETABLE_OPTIMIZE_SECONDS', 0)
+    clock = {'written': 0.0, 'solving': None}
+
+    def progress(done, total, phase, **stats):
+        now = time.monotonic()
+        if phase == 'solving' and clock['solving'] is None:
+            clock['solving'] = now
+        if phase == job.phase and now - clock['written'] < interval:
+            return
+        clock['written'] = now
+
+        if phase == 'solving' and done:
+            # Remaining sections at the rate so far, then the optimization budget
+            stats['eta_seconds'] = (now - clock['solving']) * (total - done) / done + budget
+        _update(job, phase=phase, sections_done=done, sections_total=total, **stats)
+
+    try:
+        result = solver.generate(
+            progress=progress,
+            workers=workers,
+            section_ids={job.section_id} if job.section_id else None,
+            department_id=job.department_id,
+            time_limit=job.time_limit,
+            force=job.force,
+            repair=job.repair,
+        )
+        _update(job, phase='saving', eta_seconds=0)
+        version = solver.save_result(result, user=job.requested_by, label=f"Job #{job.pk}: {job.scope_display}")
+        _update(job, version=version)
+    except Exception as exc:
+        _update(job, status='failed', phase='failed', message=str(exc), finished_at=timezone.now())
+        raise
+
+    if result.is_complete:
+        message = "Complete Full-Week Timetable Generated Successfully."
+    else:
+        message = "Timetable generated but some slots could not be filled."
+    if version.pk == result.version_id:
+        message = f"Inputs unchanged: reused version #{version.pk}. " + message
+    elif result.from_cache:
+        message = "Inputs unchanged: restored the previous result. " + message
+    elif result.changed_cells is not None:
+        message += f" Repair changed {result.changed_cells} cell(s) of the published timetable."
+
+    # Count what is still in conflict, straight from the saved rows
+    report = validate_timetable(version=version, limit=0)
+    if not report.is_valid:
+        message += f" {report.problem_count} hard-rule violation(s) remain; see the validation report."
+    _update(job, status='done', phase='done', message=message, finished_at=timezone.now())
+    return result
+
+
+def _update(job, **fields):
+    fields['updated_at'] = timezone.now()
+    for name, value in fields.items():
+        setattr(job, name, value)
+    GenerationJob.objects.filter(pk=job.pk).update(**fields)
@@ -0,0 +1,127 @@
+import io
+import json
+import platform
+import subprocess
+import time
+import tracemalloc
+
+import django
+from django.core.management import call_command
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+
+from timetable import solver
+from timetable.validation import validate_timetable
+
+# generate_synthetic_institution options per size; rooms and faculty scale
+# with the number of sections so a clash-free timetable exists
+SIZES = {
+    'small': {'departments': 3, 'semesters': 2, 'sections_per_semester': 3, 'faculty': 45, 'rooms': 24, 'labs': 6},
+    'medium': {'departments': 8, 'semesters': 4, 'sections_per_semester': 4, 'faculty': 300, 'rooms': 160, 'labs': 40},
+    'large': {'departments': 20, 'semesters': 8, 'sections_per_semester': 5, 'faculty': 1800, 'rooms': 1000,
+              'labs': 200},
+    'xlarge': {'departments': 40, 'semesters': 8, 'sections_per_semester': 10, 'faculty': 7200, 'rooms': 4000,
+               'labs': 800},
+}
+
+class Command(BaseCommand):
+    help = 'Benchmarks the timetable generator on synthetic institutions of increasing size (uses a throwaway test database)'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--sizes', default='small,medium,large',
+                            help=f"Comma-separated sizes to run, from: {', '.join(SIZES)}")
+        parser.add_argument('--time-limit', type=float, default=0,
+                            help='Optimization budget per run in seconds (0 = greedy pass only)')
+        parser.add_argument('--workers', type=int, default=1)
+        parser.add_argument('--seed', type=int, default=0)
+        parser.add_argument('--skip-memory', action='store_true',
+                            help='Skip the separate tracemalloc pass used to measure peak memory')
+        parser.add_argument('--output', default=None,
+                            help='Write the JSON report to this file (default: stdout)')
+
+    def handle(self, *args, **options):
+        sizes = [name.strip() for name in options['sizes'].split(',') if name.strip()]
+        unknown = [name for name in sizes if name not in SIZES]
+        if unknown:
+            raise CommandError(f"Unknown size(s): {', '.join(unknown)}")
+
+        # Never touch the real database: every size is loaded into a fresh test DB
+        old_name = connection.creation.create_test_db(verbosity=0, autoclobber=True, serialize=False)
+        try:
+            runs = [self._run(name, options) for name in sizes]
+        finally:
+            connection.creation.destroy_test_db(old_name, verbosity=0)
+
+        report = {
+            'created_at': timezone.now().isoformat(),
+            'commit': _git_commit(),
+            'python': platform.python_version(),
+            'django': django.get_version(),
+            'database': connection.vendor,
+            'time_limit': options['time_limit'],
+            'workers': options['workers'],
+            'seed': options['seed'],
+            'runs': runs,
+        }
+        output = json.dumps(report, indent=2)
+        if options['output']:
+            with open(options['output'], 'w') as handle:
+                handle.write(output + '\n')
+            self.stdout.write(self.style.SUCCESS(f"Report written to {options['output']}"))
+        else:
+            self.stdout.write(output)
+
+    def _run(self, name, options):
+        call_command('generate_synthetic_institution', clear=True, seed=options['seed'],
+                     stdout=io.StringIO(), **SIZES[name])
+
+        with CaptureQueriesContext(connection) as queries:
+            started = time.perf_counter()
+            result = solver.generate(workers=options['workers'], time_limit=options['time_limit'],
+                                     seed=options['seed'], force=True)
+            solved = time.perf_counter()
+            version = solver.save_result(result)
+            saved = time.perf_counter()
+
+        # Measured in a second run so tracing overhead does not skew the timings
+        peak_memory = None
+        if not options['skip_memory']:
+            tracemalloc.start()
+            solver.generate(workers=options['workers'], time_limit=options['time_limit'], seed=options['seed'],
+                            force=True)
+            peak_memory = tracemalloc.get_traced_memory()[1]
+            tracemalloc.stop()
+
+        # Only cells holding a class that breaks no hard rule count as filled
+        report = validate_timetable(version=version, limit=0)
+        filled = len(result.entries) - result.conflicted
+        run = {
+            'size': name,
+            'parameters': SIZES[name],
+            'entries': len(result.entries),
+            'conflicted_entries': result.conflicted,
+            'required_slots': result.required_slots,
+            'fill_rate': round(100 * filled / result.required_slots, 2) if result.required_slots else 0,
+            'hard_violations': report.problem_count,
+            'solve_seconds': round(solved - started, 4),
+            'save_seconds': round(saved - solved, 4),
+            'wall_seconds': round(saved - started, 4),
+            'query_count': len(queries),
+            'peak_memory_bytes': peak_memory,
+        }
+        self.stderr.write(
+            f"{name}: {filled}/{run['required_slots']} slots conflict-free ({run['fill_rate']}%), "
+            f"{run['hard_violations']} violations, {run['wall_seconds']}s, {run['query_count']} queries"
+        )
+        return run
+
+
+def _git_commit():
+    try:
+        return subprocess.run(
+            ['git', 'rev-parse', '--short', 'HEAD'], capture_output=True, text=True, check=True
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
@@ -0,0 +1,83 @@
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+
+from timetable import solver
+from timetable.validation import validate_timetable
+
+
+def duration(value):
+    """Parse '30', '30s' or '2m' into seconds."""
+    value = value.strip().lower()
+    multiplier = 1
+    if value.endswith('m'):
+        value, multiplier = value[:-1], 60
+    elif value.endswith('s'):
+        value = value[:-1]
+    try:
+        return float(value) * multiplier
+    except ValueError:
+        raise CommandError(f"Invalid duration: {value!r}")
+
+
+class Command(BaseCommand):
+    help = 'Generates the timetable synchronously (greedy pass + time-budgeted optimization)'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--time-limit', type=duration, default=None,
+                            help='Optimization budget, e.g. 30s or 2m (defaults to TIMETABLE_OPTIMIZE_SECONDS)')
+        parser.add_argument('--seed', type=int, default=None,
+                            help='Random seed for a reproducible optimization run')
+        parser.add_argument('--section', type=int, action='append', dest='sections',
+                            help='Regenerate only this section id (repeatable)')
+        parser.add_argument('--department', type=int, default=None,
+                            help='Regenerate only this department id')
+        parser.add_argument('--workers', type=int, default=None,
+                            help='Processes used to solve departments in parallel')
+        parser.add_argument('--force', action='store_true',
+                            help='Re-solve even when a cached result matches the inputs')
+        parser.add_argument('--repair', action='store_true',
+                            help='Start from the published timetable and only re-place entries that became invalid')
+        parser.add_argument('--publish', action='store_true',
+                            help='Publish the new version immediately instead of leaving it as a draft')
+
+    def handle(self, *args, **options):
+        started = time.monotonic()
+        self.stdout.write("Generating timetable...")
+
+        result = solver.generate(
+            workers=options['workers'],
+            section_ids=set(options['sections']) if options['sections'] else None,
+            department_id=options['department'],
+            time_limit=options['time_limit'],
+            seed=options['seed'],
+            force=options['force'],
+            repair=options['repair'],
+        )
+        version = solver.save_result(result, label="Command line")
+        if result.from_cache:
+            self.stdout.write("Inputs unchanged: restored the cached result (use --force to re-solve).")
+        elif result.changed_cells is not None:
+            self.stdout.write(f"Repair changed {result.changed_cells} cell(s) of the published timetable.")
+
+        elapsed = time.monotonic() - started
+        summary = f"{len(result.entries)} / {result.required_slots} slots filled in {elapsed:.1f}s"
+        # Count what is still in conflict, straight from the saved rows
+        report = validate_timetable(version=version, limit=0)
+        if not report.is_valid:
+            self.stdout.write(self.style.ERROR(
+                f"Timetable generated with {report.problem_count} hard-rule violation(s): {summary}. "
+                f"Run validate_timetable --timetable-version {version.pk} for details."
+            ))
+        elif result.is_complete:
+            self.stdout.write(self.style.SUCCESS(f"Complete Full-Week Timetable Generated: {summary}"))
+        else:
+            self.stdout.write(self.style.WARNING(f"Some slots could not be filled: {summary}"))
+
+        if options['publish']:
+            version.publish()
+            self.stdout.write(f"Published version #{version.pk}.")
+        elif version.pk == result.version_id:
+            self.stdout.write(f"Reused {version.get_status_display().lower()} version #{version.pk}.")
+        else:
+            self.stdout.write(f"Saved draft version #{version.pk}; publish it from the Versions page.")
@@ -0,0 +1,41 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from timetable import jobs
+
+
+class Command(BaseCommand):
+    help = 'Runs queued timetable generation jobs in the background'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--poll-interval', type=float, default=2.0,
+                            help='Seconds to wait between queue checks when idle')
+        parser.add_argument('--once', action='store_true',
+                            help='Process the jobs currently queued, then exit')
+        parser.add_argument('--workers', type=int, default=None,
+                            help='Processes used to solve departments in parallel '
+                                 '(defaults to TIMETABLE_GENERATION_WORKERS)')
+
+    def handle(self, *args, **options):
+        self.stdout.write("Generation worker started. Waiting for jobs...")
+        abandoned = jobs.fail_stale_jobs()
+        if abandoned:
+            self.stdout.write(self.style.WARNING(f"Marked {abandoned} abandoned job(s) as failed."))
+
+        while True:
+            job = jobs.claim_next_job()
+
+            if job is None:
+                if options['once']:
+                    break
+                time.sleep(options['poll_interval'])
+                continue
+
+            self.stdout.write(f"Running generation job #{job.pk}...")
+            try:
+                jobs.run_job(job, workers=options['workers'])
+            except Exception as exc:
+                self.stderr.write(self.style.ERROR(f"Job #{job.pk} failed: {exc}"))
+            else:
+                self.stdout.write(self.style.SUCCESS(f"Job #{job.pk} finished: {job.message}"))
@@ -0,0 +1,75 @@
+import json
+
+from django.core.management.base import BaseCommand, CommandError
+
+from timetable.models import TimetableVersion
+from timetable.validation import validate_timetable
+
+
+class Command(BaseCommand):
+    help = ('Reports clashes, room capacity violations, busy-period bookings, faculty overloads and labs '
+            'outside lab rooms in the stored timetable')
+
+    def add_arguments(self, parser):
+        parser.add_argument('--timetable-version', type=int, default=None,
+                            help='Timetable version id (defaults to the published version)')
+        parser.add_argument('--limit', type=int, default=20,
+                            help='Rows listed per category (totals are always exact)')
+        parser.add_argument('--json', action='store_true',
+                            help='Print the report as JSON')
+        parser.add_argument('--strict', action='store_true',
+                            help='Exit with an error status when any problem is found')
+
+    def handle(self, *args, **options):
+        version = None
+        if options['timetable_version'] is not None:
+            version = TimetableVersion.objects.filter(pk=options['timetable_version']).first()
+            if version is None:
+                raise CommandError(f"No timetable version #{options['timetable_version']}")
+        report = validate_timetable(version=version, limit=options['limit'])
+
+        if options['json']:
+            self.stdout.write(json.dumps(report.as_dict(), indent=2))
+        else:
+            for kind, rows in report.clashes.items():
+                for row in rows:
+                    self.stdout.write(
+                        f"{kind} clash: {row['resource']} booked {row['count']}x on {row['day']} {row['time']}"
+                    )
+            for row in report.capacity:
+                self.stdout.write(
+                    f"capacity: {row['section']} ({row['students']}) in {row['room']} "
+                    f"({row['capacity']}) on {row['day']} {row['time']}"
+                )
+            for row in report.unavailable:
+                self.stdout.write(
+                    f"unavailable: {row['faculty']} teaches {row['section']} on {row['day']} {row['time']}, "
+                    f"marked busy"
+                )
+            for row in report.overload:
+                self.stdout.write(
+                    f"overload: {row['faculty']} has {row['classes']} classes on {row['day'] or 'the week'} "
+                    f"(limit {row['limit']})"
+                )
+            for row in report.room_type:
+                self.stdout.write(f"room type: lab of {row['section']} in {row['room']} on {row['day']} {row['time']}")
+            for row in report.lab_timing:
+                self.stdout.write(f"lab timing: {row['section']} has {row['labs']} labs on {row['day']}")
+
+            summary = (
+                f"{report.total_entries} entries, {report.clash_count} clash(es), "
+                f"{report.capacity_count} capacity violation(s), {report.faculty_count} faculty limit "
+                f"violation(s), {report.room_type_count} lab(s) outside a lab"
+            )
+            if 'lab_timing' in report.rules:
+                summary += f", {report.lab_timing_count} extra lab(s) in a day"
+            if report.soft_count:
+                summary += (f"; {report.soft_count} of these break rules that are not mandatory "
+                            f"({', '.join(sorted(report.soft_kinds))})")
+            if report.is_valid:
+                self.stdout.write(self.style.SUCCESS(f"Timetable is valid: {summary}"))
+            else:
+                self.stdout.write(self.style.WARNING(f"Timetable has problems: {summary}"))
+
+        if options['strict'] and not report.is_valid:
+            raise CommandError(f"{report.problem_count} problem(s) found")
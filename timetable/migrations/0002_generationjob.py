@@ -0,0 +1,34 @@
+# Generated by Django 5.2.10 on 2026-10-18 17:17
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('timetable', '0001_initial'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='GenerationJob',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('status', models.CharField(choices=[('queued', 'Queued'), ('running', 'Running'), ('done', 'Completed'), ('failed', 'Failed')], default='queued', max_length=10)),
+                ('phase', models.CharField(choices=[('queued', 'Waiting for worker'), ('loading', 'Loading inputs'), ('solving', 'Placing sections'), ('saving', 'Saving timetable'), ('done', 'Finished'), ('failed', 'Failed')], default='queued', max_length=10)),
+                ('sections_total', models.PositiveIntegerField(default=0)),
+                ('sections_done', models.PositiveIntegerField(default=0)),
+                ('message', models.TextField(blank=True)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('started_at', models.DateTimeField(blank=True, null=True)),
+                ('finished_at', models.DateTimeField(blank=True, null=True)),
+                ('requested_by', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'ordering': ['-created_at'],
+            },
+        ),
+    ]
@@ -0,0 +1,25 @@
+# Generated by Django 5.2.10 on 2026-10-18 17:19
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0002_feedback_subject'),
+        ('timetable', '0002_generationjob'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='generationjob',
+            name='department',
+            field=models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.CASCADE, to='core.department'),
+        ),
+        migrations.AddField(
+            model_name='generationjob',
+            name='section',
+            field=models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.CASCADE, to='core.section'),
+        ),
+    ]
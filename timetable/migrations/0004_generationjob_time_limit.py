@@ -0,0 +1,23 @@
+# Generated by Django 5.2.10 on 2026-10-18 17:21
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('timetable', '0003_generationjob_scope'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='generationjob',
+            name='time_limit',
+            field=models.PositiveIntegerField(blank=True, null=True),
+        ),
+        migrations.AlterField(
+            model_name='generationjob',
+            name='phase',
+            field=models.CharField(choices=[('queued', 'Waiting for worker'), ('loading', 'Loading inputs'), ('solving', 'Placing sections'), ('optimizing', 'Optimizing'), ('saving', 'Saving timetable'), ('done', 'Finished'), ('failed', 'Failed')], default='queued', max_length=10),
+        ),
+    ]
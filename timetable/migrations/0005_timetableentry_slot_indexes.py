@@ -0,0 +1,28 @@
+# Generated by Django 5.2.10 on 2026-10-18 17:33
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0002_feedback_subject'),
+        ('faculty', '0002_facultyavailability'),
+        ('scheduler', '0001_initial'),
+        ('timetable', '0004_generationjob_time_limit'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='timetableentry',
+            index=models.Index(fields=['day', 'timeslot', 'classroom'], name='entry_room_slot_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='timetableentry',
+            index=models.Index(fields=['day', 'timeslot', 'faculty'], name='entry_faculty_slot_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='timetableentry',
+            index=models.Index(fields=['day', 'timeslot', 'section'], name='entry_section_slot_idx'),
+        ),
+    ]
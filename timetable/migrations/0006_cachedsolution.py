@@ -0,0 +1,32 @@
+# Generated by Django 5.2.10 on 2026-10-18 17:38
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('timetable', '0005_timetableentry_slot_indexes'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='CachedSolution',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('fingerprint', models.CharField(max_length=64, unique=True)),
+                ('assignment', models.JSONField()),
+                ('required_slots', models.PositiveIntegerField()),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('last_used_at', models.DateTimeField(auto_now=True)),
+            ],
+            options={
+                'ordering': ['-last_used_at'],
+            },
+        ),
+        migrations.AddField(
+            model_name='generationjob',
+            name='force',
+            field=models.BooleanField(default=False),
+        ),
+    ]
@@ -0,0 +1,93 @@
+# Generated by Django 5.2.10 on 2026-10-18 17:40
+
+import django.db.models.deletion
+import django.utils.timezone
+from django.conf import settings
+from django.db import migrations, models
+
+
+def adopt_existing_entries(apps, schema_editor):
+    """Publish the timetable that existed before versioning as version #1."""
+    TimetableEntry = apps.get_model('timetable', 'TimetableEntry')
+    TimetableVersion = apps.get_model('timetable', 'TimetableVersion')
+    if TimetableEntry.objects.exists():
+        version = TimetableVersion.objects.create(
+            status='published', label='Imported timetable', published_at=django.utils.timezone.now()
+        )
+        TimetableEntry.objects.update(version=version)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0002_feedback_subject'),
+        ('faculty', '0002_facultyavailability'),
+        ('scheduler', '0001_initial'),
+        ('timetable', '0006_cachedsolution'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='TimetableVersion',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('status', models.CharField(choices=[('draft', 'Draft'), ('published', 'Published'), ('archived', 'Archived')], default='draft', max_length=10)),
+                ('label', models.CharField(blank=True, max_length=100)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('published_at', models.DateTimeField(blank=True, null=True)),
+            ],
+            options={
+                'ordering': ['-created_at'],
+            },
+        ),
+        migrations.RemoveIndex(
+            model_name='timetableentry',
+            name='entry_room_slot_idx',
+        ),
+        migrations.RemoveIndex(
+            model_name='timetableentry',
+            name='entry_faculty_slot_idx',
+        ),
+        migrations.RemoveIndex(
+            model_name='timetableentry',
+            name='entry_section_slot_idx',
+        ),
+        migrations.AddField(
+            model_name='timetableversion',
+            name='created_by',
+            field=models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, to=settings.AUTH_USER_MODEL),
+        ),
+        migrations.AddField(
+            model_name='generationjob',
+            name='version',
+            field=models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, to='timetable.timetableversion'),
+        ),
+        migrations.AddField(
+            model_name='timetableentry',
+            name='version',
+            field=models.ForeignKey(null=True, on_delete=django.db.models.deletion.CASCADE, related_name='entries', to='timetable.timetableversion'),
+        ),
+        migrations.RunPython(adopt_existing_entries, migrations.RunPython.noop),
+        migrations.AlterField(
+            model_name='timetableentry',
+            name='version',
+            field=models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='entries', to='timetable.timetableversion'),
+        ),
+        migrations.AddIndex(
+            model_name='timetableentry',
+            index=models.Index(fields=['version', 'day', 'timeslot', 'classroom'], name='entry_room_slot_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='timetableentry',
+            index=models.Index(fields=['version', 'day', 'timeslot', 'faculty'], name='entry_faculty_slot_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='timetableentry',
+            index=models.Index(fields=['version', 'day', 'timeslot', 'section'], name='entry_section_slot_idx'),
+        ),
+        migrations.AddConstraint(
+            model_name='timetableversion',
+            constraint=models.UniqueConstraint(condition=models.Q(('status', 'published')), fields=('status',), name='single_published_version'),
+        ),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 5.2.10 on 2026-10-18 17:47
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('timetable', '0007_timetableversion'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='generationjob',
+            name='repair',
+            field=models.BooleanField(default=False),
+        ),
+    ]
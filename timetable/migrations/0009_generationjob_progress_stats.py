@@ -0,0 +1,28 @@
+# Generated by Django 5.2.10 on 2026-10-18 17:49
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('timetable', '0008_generationjob_repair'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='generationjob',
+            name='best_score',
+            field=models.PositiveIntegerField(blank=True, null=True),
+        ),
+        migrations.AddField(
+            model_name='generationjob',
+            name='eta_seconds',
+            field=models.FloatField(blank=True, null=True),
+        ),
+        migrations.AddField(
+            model_name='generationjob',
+            name='unfilled_slots',
+            field=models.PositiveIntegerField(blank=True, null=True),
+        ),
+    ]
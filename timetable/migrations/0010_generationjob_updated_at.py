@@ -0,0 +1,18 @@
+# Generated by Django 5.2.10 on 2026-10-18 18:07
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('timetable', '0009_generationjob_progress_stats'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='generationjob',
+            name='updated_at',
+            field=models.DateTimeField(blank=True, null=True),
+        ),
+    ]
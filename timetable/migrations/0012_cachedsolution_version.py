@@ -0,0 +1,19 @@
+# Generated by Django 5.2.10 on 2026-10-18 18:34
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('timetable', '0011_create_cache_table'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='cachedsolution',
+            name='version',
+            field=models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='+', to='timetable.timetableversion'),
+        ),
+    ]
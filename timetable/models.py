@@ -1,7 +1,72 @@
-from django.db import models
+from django.db import models, transaction
+from django.conf import settings
+from django.utils import timezone
+
+from .signals import timetable_published
+
+class TimetableVersion(models.Model):
+    # Every generation run writes a new draft; publishing swaps which version readers see
+    STATUS_CHOICES = [
+        ('draft', 'Draft'),
+        ('published', 'Published'),
+        ('archived', 'Archived'),
+    ]
+
+    status = models.CharField(max_length=10, choices=STATUS_CHOICES, default='draft')
+    label = models.CharField(max_length=100, blank=True)
+    created_by = models.ForeignKey(settings.AUTH_USER_MODEL, on_delete=models.SET_NULL, null=True, blank=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+    published_at = models.DateTimeField(null=True, blank=True)
+
+    class Meta:
+        ordering = ['-created_at']
+        constraints = [
+            models.UniqueConstraint(fields=['status'], condition=models.Q(status='published'),
+                                    name='single_published_version'),
+        ]
+
+    def __str__(self):
+        return f"Version #{self.pk} ({self.get_status_display()})"
+
+    @classmethod
+    def published(cls):
+        return cls.objects.filter(status='published').first()
+
+    def publish(self):
+        """Make this version the live timetable and archive the previous one.
+
+        Both UPDATEs run in one transaction, so readers see either the old
+        or the new version, never a mix; no entry rows are touched.
+        :data:`~timetable.signals.timetable_published` is sent once the
+        swap has committed.
+        """
+        with transaction.atomic():
+            TimetableVersion.objects.filter(status='published').exclude(pk=self.pk).update(status='archived')
+            self.status = 'published'
+            self.published_at = timezone.now()
+            TimetableVersion.objects.filter(pk=self.pk).update(status=self.status, published_at=self.published_at)
+            self.prune()
+            transaction.on_commit(lambda: timetable_published.send(sender=TimetableVersion, version=self))
+
+    @classmethod
+    def prune(cls):
+        """Delete the oldest drafts and archived versions beyond TIMETABLE_VERSIONS_KEPT."""
+        keep = getattr(settings, 'TIMETABLE_VERSIONS_KEPT', 10)
+        stale = list(cls.objects.exclude(status='published').values_list('pk', flat=True)[keep:])
+        if stale:
+            cls.objects.filter(pk__in=stale).delete()
+
+
+class TimetableEntryQuerySet(models.QuerySet):
+
+    def published(self):
+        """Entries of the live version; one join, so a concurrent publish is never seen half-way."""
+        return self.filter(version__status='published')
+
 
 class TimetableEntry(models.Model):
     # Requirement H: Core data for the grid view
+    version = models.ForeignKey(TimetableVersion, on_delete=models.CASCADE, related_name='entries')
     day = models.CharField(max_length=10)
     timeslot = models.ForeignKey('scheduler.TimeSlot', on_delete=models.CASCADE)
     subject = models.ForeignKey('core.Subject', on_delete=models.CASCADE)
@@ -10,8 +75,125 @@ class TimetableEntry(models.Model):
     faculty = models.ForeignKey('faculty.Faculty', on_delete=models.SET_NULL, null=True)
     is_fixed = models.BooleanField(default=False)
 
+    objects = TimetableEntryQuerySet.as_manager()
+
     class Meta:
         verbose_name_plural = "Timetable Entries"
+        # Cover the (version, day, slot, resource) GROUP BYs in timetable.validation
+        indexes = [
+            models.Index(fields=['version', 'day', 'timeslot', 'classroom'], name='entry_room_slot_idx'),
+            models.Index(fields=['version', 'day', 'timeslot', 'faculty'], name='entry_faculty_slot_idx'),
+            models.Index(fields=['version', 'day', 'timeslot', 'section'], name='entry_section_slot_idx'),
+        ]
+
+    def __str__(self):
+        return f"{self.day} - {self.subject.code} for {self.section.name}"
+
+class GenerationJob(models.Model):
+    # Timetable generation requests, picked up by the run_generation_worker command
+    STATUS_CHOICES = [
+        ('queued', 'Queued'),
+        ('running', 'Running'),
+        ('done', 'Completed'),
+        ('failed', 'Failed'),
+    ]
+    PHASE_CHOICES = [
+        ('queued', 'Waiting for worker'),
+        ('loading', 'Loading inputs'),
+        ('solving', 'Placing sections'),
+        ('optimizing', 'Optimizing'),
+        ('saving', 'Saving timetable'),
+        ('done', 'Finished'),
+        ('failed', 'Failed'),
+    ]
+
+    requested_by = models.ForeignKey(settings.AUTH_USER_MODEL, on_delete=models.SET_NULL, null=True, blank=True)
+    # Optional scope: regenerate only this section / department, keep everything else
+    section = models.ForeignKey('core.Section', on_delete=models.CASCADE, null=True, blank=True)
+    department = models.ForeignKey('core.Department', on_delete=models.CASCADE, null=True, blank=True)
+    status = models.CharField(max_length=10, choices=STATUS_CHOICES, default='queued')
+    phase = models.CharField(max_length=10, choices=PHASE_CHOICES, default='queued')
+    # Local-search budget in seconds; empty uses TIMETABLE_OPTIMIZE_SECONDS
+    time_limit = models.PositiveIntegerField(null=True, blank=True)
+    # Re-solve even when a cached result matches the inputs
+    force = models.BooleanField(default=False)
+    # Start from the published timetable and change as few cells as possible
+    repair = models.BooleanField(default=False)
+    # Draft written by this run
+    version = models.ForeignKey(TimetableVersion, on_delete=models.SET_NULL, null=True, blank=True)
+    sections_total = models.PositiveIntegerField(default=0)
+    sections_done = models.PositiveIntegerField(default=0)
+    # Live solver figures, written at most every TIMETABLE_PROGRESS_INTERVAL seconds
+    best_score = models.PositiveIntegerField(null=True, blank=True)
+    unfilled_slots = models.PositiveIntegerField(null=True, blank=True)
+    eta_seconds = models.FloatField(null=True, blank=True)
+    message = models.TextField(blank=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+    started_at = models.DateTimeField(null=True, blank=True)
+    finished_at = models.DateTimeField(null=True, blank=True)
+    # Last write by the worker; a running job that stops updating is failed (see jobs.fail_stale_jobs)
+    updated_at = models.DateTimeField(null=True, blank=True)
+
+    class Meta:
+        ordering = ['-created_at']
+
+    def __str__(self):
+        return f"Generation #{self.pk} ({self.get_status_display()})"
+
+    @property
+    def scope_display(self):
+        if self.section_id:
+            return f"Section {self.section}"
+        if self.department_id:
+            return f"Department {self.department.code}"
+        return "Full Institution"
+
+    @property
+    def percent(self):
+        if self.status == 'done':
+            return 100
+        if not self.sections_total:
+            return 0
+        return round((self.sections_done / self.sections_total) * 100)
+
+    @property
+    def elapsed_seconds(self):
+        if not self.started_at:
+            return 0
+        end = self.finished_at or timezone.now()
+        return round((end - self.started_at).total_seconds(), 1)
+
+    def progress_payload(self):
+        """Progress report shared by the JSON status and the event stream."""
+        return {
+            'id': self.id,
+            'status': self.status,
+            'phase': self.phase,
+            'phase_display': self.get_phase_display(),
+            'percent': self.percent,
+            'sections_done': self.sections_done,
+            'sections_total': self.sections_total,
+            'best_score': self.best_score,
+            'unfilled_slots': self.unfilled_slots,
+            'eta_seconds': round(self.eta_seconds) if self.eta_seconds is not None else None,
+            'elapsed_seconds': self.elapsed_seconds,
+            'message': self.message,
+        }
+
+
+class CachedSolution(models.Model):
+    # Solver output keyed by the input fingerprint (timetable.problem.fingerprint)
+    fingerprint = models.CharField(max_length=64, unique=True)
+    # One [section, subject, classroom, faculty, timeslot, day, is_fixed] row per entry
+    assignment = models.JSONField()
+    required_slots = models.PositiveIntegerField()
+    # Version saved from this solution; a cache hit returns it instead of writing a copy
+    version = models.ForeignKey(TimetableVersion, on_delete=models.SET_NULL, null=True, blank=True, related_name='+')
+    created_at = models.DateTimeField(auto_now_add=True)
+    last_used_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        ordering = ['-last_used_at']
 
     def __str__(self):
-        return f"{self.day} - {self.subject.code} for {self.section.name}"
\ No newline at end of file
+        return f"Cached solution {self.fingerprint[:12]} ({len(self.assignment)} entries)"
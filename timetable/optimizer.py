@@ -0,0 +1,335 @@
+"""
+Local-search optimizer for generated timetables.
+
+The greedy generator places sections first-fit, going over weekly quotas
+when it has to and leaving a cell empty when no valid room or teacher is
+left. This module takes that seed and runs simulated annealing over room, faculty, subject and
+time-swap moves for a fixed wall-clock budget, returning the best timetable
+it has seen. Moves are scored with an incremental (delta) cost, so one
+iteration costs the same however large the timetable is. Clash and capacity
+rules come from the constraint pipeline and only enabled rules are scored.
+
+Repair runs (``problem.previous`` set) add a ``CHANGE`` cost for every
+entry that differs from the previous timetable, start cold so that cost is
+almost never paid for a soft gain, and stop as soon as nothing breaks a
+hard rule. When the greedy pass of a repair or scoped (section or
+department) run left nothing infeasible the search is skipped entirely.
+"""
+import math
+import random
+import time
+from array import array
+from collections import defaultdict
+
+from .constraints import HARD, SOFT, build_constraints
+
+# Built-in costs on top of the ConstraintRule pipeline (see timetable.constraints):
+# HARD for a theory-only room given a lab, faculty from another department,
+# marked busy or over their daily/weekly class limit; SOFT for a subject over
+# its weekly quota or repeated in consecutive periods; CHANGE, in a repair
+# run, for an entry that differs from the previous timetable.
+
+CHANGE = 10
+T_START = 20.0
+T_REPAIR_START = 2.0  # exp(-CHANGE / 2) < 1%: repair runs do not churn stable cells
+T_END = 0.2
+CLOCK_EVERY = 128     # iterations between wall-clock checks
+REPORT_EVERY = 1.0    # seconds between progress reports
+REFRESH_EVERY = 2000  # iterations between rebuilding the list of conflicted entries
+
+
+def optimize(problem, placements, time_limit, seed=None, progress=None):
+    """Improve ``placements`` for at most ``time_limit`` seconds.
+
+    ``placements`` are the solver's ``(section, subject, room, faculty, cell)``
+    index tuples into ``problem``. ``problem.kept`` and ``problem.fixed``
+    occupy rooms and faculty but are never moved. ``progress``, if given, is
+    called as ``progress(best_cost, conflicted_entries, seconds_left)`` about
+    once every ``REPORT_EVERY`` seconds.
+    """
+    if not placements or time_limit <= 0 or not problem.room_ids:
+        return placements
+
+    search = LocalSearch(problem, placements, seed=seed)
+    if (problem.previous or problem.scope_ids is not None) and not search.conflicted_entries():
+        # A clean repair already keeps every cell it can, and a clean scoped run
+        # only has its own few sections to polish; searching is not worth the budget
+        return placements
+    search.run(time_limit, progress=progress)
+    return search.best_placements()
+
+
+def conflict_count(problem, placements):
+    """How many of ``placements`` break a hard rule, by the optimizer's own checks."""
+    return len(LocalSearch(problem, placements).conflicted_entries())
+
+
+class LocalSearch:
+    """Simulated annealing over a fixed set of timetable entries."""
+
+    def __init__(self, problem, placements, seed=None):
+        self.problem = problem
+        self.random = random.Random(seed)
+        self.all_rooms = [r for r in range(len(problem.room_ids)) if problem.room_available[r]] \
+            or list(range(len(problem.room_ids)))
+
+        # ConstraintRule checkers, with kept and fixed placements booked
+        self.constraints = build_constraints(problem)
+        self.hard_constraints = [constraint for constraint in self.constraints if constraint.weight >= HARD]
+
+        self.n_faculty = len(problem.faculty_ids)
+        self.n_subjects = len(problem.subject_ids)
+        self.usage = defaultdict(int)  # section * n_subjects + subject -> periods per week
+        self.n_days = len(problem.day_cells)
+        self.day_load = array('i', bytes(4 * self.n_faculty * self.n_days))  # faculty * n_days + day
+        self.week_load = array('i', bytes(4 * self.n_faculty))
+        self.grid = array('i', [-1]) * (len(problem.section_ids) * problem.n_cells)  # section * n_cells + cell -> subject
+        # Repair runs: (section, cell) -> (subject, room, faculty) in the previous timetable
+        self.previous = {(s, c): (subject, r, f) for s, subject, r, f, c in problem.previous}
+
+        for section, subject, room, faculty, cell in problem.kept + problem.fixed:
+            if faculty >= 0:
+                self.day_load[faculty * self.n_days + problem.cell_day_index[cell]] += 1
+                self.week_load[faculty] += 1
+
+        # Fixed slots also count towards quotas and back-to-back checks
+        for section, subject, room, faculty, cell in problem.fixed:
+            self.usage[section * self.n_subjects + subject] += 1
+            self.grid[section * problem.n_cells + cell] = subject
+
+        # Movable entries, stored column-wise
+        self.section = []
+        self.subject = []
+        self.room = []
+        self.faculty = []
+        self.cell = []
+        self.entries_of_section = defaultdict(list)
+        for section, subject, room, faculty, cell in placements:
+            self.entries_of_section[section].append(len(self.section))
+            self.section.append(section)
+            self.subject.append(subject)
+            self.room.append(room)
+            self.faculty.append(faculty)
+            self.cell.append(cell)
+
+        self.cost = sum(self._add(i) for i in range(len(self.section)))
+        self.conflicted = []
+        self.iterations = 0
+        self._save_best()
+
+    # -- cost bookkeeping ---------------------------------------------------
+
+    def _static_cost(self, i):
+        problem, subject = self.problem, self.subject[i]
+        cost = 0
+        if not problem.room_suits(self.room[i], subject):
+            cost += HARD
+        faculty = self.faculty[i]
+        if faculty >= 0:
+            if problem.faculty_department[faculty] != problem.subject_department[subject]:
+                cost += HARD
+            if problem.faculty_busy[faculty] & (1 << self.cell[i]):
+                cost += HARD
+        return cost
+
+    def _change_cost(self, i):
+        if self.previous and self.previous.get((self.section[i], self.cell[i])) != \
+                (self.subject[i], self.room[i], self.faculty[i]):
+            return CHANGE
+        return 0
+
+    def _same_subject_neighbours(self, section, cell, subject):
+        base = section * self.problem.n_cells
+        count = 0
+        neighbour = self.problem.prev_cell[cell]
+        if neighbour >= 0 and self.grid[base + neighbour] == subject:
+            count += 1
+        neighbour = self.problem.next_cell[cell]
+        if neighbour >= 0 and self.grid[base + neighbour] == subject:
+            count += 1
+        return count
+
+    def _assignment(self, i):
+        return self.section[i], self.subject[i], self.room[i], self.faculty[i], self.cell[i]
+
+    def _add(self, i):
+        """Book entry ``i`` into the counters and return the cost it adds."""
+        section, subject, cell = self.section[i], self.subject[i], self.cell[i]
+        cost = self._static_cost(i) + self._change_cost(i)
+
+        assignment = self._assignment(i)
+        for constraint in self.constraints:
+            cost += constraint.delta(assignment)
+
+        faculty = self.faculty[i]
+        if faculty >= 0:
+            key = faculty * self.n_days + self.problem.cell_day_index[cell]
+            self.day_load[key] += 1
+            if self.day_load[key] > self.problem.faculty_max_day[faculty]:
+                cost += HARD
+            self.week_load[faculty] += 1
+            if self.week_load[faculty] > self.problem.faculty_max_week[faculty]:
+                cost += HARD
+
+        key = section * self.n_subjects + subject
+        self.usage[key] += 1
+        if self.usage[key] > self.problem.subject_quota[subject]:
+            cost += SOFT
+
+        cost += SOFT * self._same_subject_neighbours(section, cell, subject)
+        self.grid[section * self.problem.n_cells + cell] = subject
+        return cost
+
+    def _remove(self, i):
+        """Take entry ``i`` out of the counters and return the cost it carried."""
+        section, subject, cell = self.section[i], self.subject[i], self.cell[i]
+        cost = self._static_cost(i) + self._change_cost(i)
+
+        assignment = self._assignment(i)
+        for constraint in self.constraints:
+            cost -= constraint.delta(assignment, -1)
+
+        faculty = self.faculty[i]
+        if faculty >= 0:
+            key = faculty * self.n_days + self.problem.cell_day_index[cell]
+            if self.day_load[key] > self.problem.faculty_max_day[faculty]:
+                cost += HARD
+            self.day_load[key] -= 1
+            if self.week_load[faculty] > self.problem.faculty_max_week[faculty]:
+                cost += HARD
+            self.week_load[faculty] -= 1
+
+        key = section * self.n_subjects + subject
+        if self.usage[key] > self.problem.subject_quota[subject]:
+            cost += SOFT
+        self.usage[key] -= 1
+
+        self.grid[section * self.problem.n_cells + cell] = -1
+        cost += SOFT * self._same_subject_neighbours(section, cell, subject)
+        return cost
+
+    def _is_conflicted(self, i):
+        assignment = self._assignment(i)
+        if any(constraint.violated(assignment) for constraint in self.hard_constraints):
+            return True
+        faculty, cell = self.faculty[i], self.cell[i]
+        if faculty >= 0:
+            if self.day_load[faculty * self.n_days + self.problem.cell_day_index[cell]] > self.problem.faculty_max_day[faculty]:
+                return True
+            if self.week_load[faculty] > self.problem.faculty_max_week[faculty]:
+                return True
+        return self._static_cost(i) > 0
+
+    def conflicted_entries(self):
+        """Indices of the entries that currently break a hard rule."""
+        return [i for i in range(len(self.section)) if self._is_conflicted(i)]
+
+    # -- moves --------------------------------------------------------------
+
+    def _rooms_for(self, i):
+        return self.problem.rooms_for(self.section[i], self.subject[i]) or self.all_rooms
+
+    def _propose(self, i):
+        """Return ``(indices, changes)`` for a random move of entry ``i``, or None.
+
+        ``changes`` is a list of ``(column, index, new_value)``.
+        """
+        problem = self.problem
+        kind = self.random.random()
+
+        if kind < 0.35:
+            room = self.random.choice(self._rooms_for(i))
+            if room == self.room[i]:
+                return None
+            return (i,), [(self.room, i, room)]
+
+        if kind < 0.6:
+            candidates = problem.department_faculty[problem.subject_department[self.subject[i]]]
+            if not candidates:
+                return None
+            faculty = self.random.choice(candidates)
+            if faculty == self.faculty[i]:
+                return None
+            return (i,), [(self.faculty, i, faculty)]
+
+        if kind < 0.85:
+            j = self.random.choice(self.entries_of_section[self.section[i]])
+            if j == i:
+                return None
+            return (i, j), [(self.cell, i, self.cell[j]), (self.cell, j, self.cell[i])]
+
+        subject = self.random.choice(problem.section_subjects[self.section[i]])
+        if subject == self.subject[i]:
+            return None
+        return (i,), [(self.subject, i, subject)]
+
+    def step(self, temperature):
+        if self.conflicted and self.random.random() < 0.7:
+            i = self.random.choice(self.conflicted)
+        else:
+            i = self.random.randrange(len(self.section))
+
+        move = self._propose(i)
+        if move is None:
+            return False
+        indices, changes = move
+
+        removed = sum(self._remove(k) for k in indices)
+        previous = [(column, k, column[k]) for column, k, _ in changes]
+        for column, k, value in changes:
+            column[k] = value
+        delta = sum(self._add(k) for k in indices) - removed
+
+        if delta <= 0 or self.random.random() < math.exp(-delta / temperature):
+            self.cost += delta
+            return True
+
+        for k in indices:
+            self._remove(k)
+        for column, k, value in previous:
+            column[k] = value
+        for k in indices:
+            self._add(k)
+        return False
+
+    # -- driver -------------------------------------------------------------
+
+    def run(self, time_limit, progress=None):
+        started = time.monotonic()
+        deadline = started + time_limit
+        next_report = started
+        t_start = T_REPAIR_START if self.previous else T_START
+        temperature = t_start
+        iteration = 0
+
+        while self.best_cost > 0:
+            if iteration % CLOCK_EVERY == 0:
+                now = time.monotonic()
+                if now >= deadline:
+                    break
+                temperature = t_start * (T_END / t_start) ** ((now - started) / time_limit)
+                if progress and now >= next_report:
+                    progress(self.best_cost, len(self.conflicted), deadline - now)
+                    next_report = now + REPORT_EVERY
+            if iteration % REFRESH_EVERY == 0:
+                self.conflicted = self.conflicted_entries()
+                if self.previous and not self.conflicted and self.cost <= self.best_cost:
+                    # Repaired: every further move only changes more cells
+                    self._save_best()
+                    break
+
+            if self.step(temperature) and self.cost < self.best_cost:
+                self._save_best()
+            iteration += 1
+
+        self.iterations = iteration
+        if progress:
+            progress(self.best_cost, len(self.conflicted_entries()), 0)
+
+    def _save_best(self):
+        self.best_cost = self.cost
+        self.best = (self.subject[:], self.room[:], self.faculty[:], self.cell[:])
+
+    def best_placements(self):
+        subjects, rooms, faculty, cells = self.best
+        return list(zip(self.section, subjects, rooms, faculty, cells))
@@ -0,0 +1,294 @@
+"""
+Problem compiler for the timetable solver.
+
+:func:`compile_problem` reads the database once and turns it into a
+:class:`Problem`: every section, subject, room, faculty member, department
+and (day, period) cell gets a dense integer index, and the attributes the
+solver needs live in flat ``array``s. The solver and the optimizer work only
+on those indices; database ids are looked up again when the result is saved.
+"""
+import hashlib
+from array import array
+from collections import defaultdict
+
+from django.db.models import Q
+
+from core.models import Section, Subject, Classroom
+from scheduler.models import TimeSlot, FixedSlot
+from faculty.models import Faculty, FacultyAvailability
+from .constraints import active_rules
+from .models import TimetableEntry
+
+DAYS = ['Monday', 'Tuesday', 'Wednesday', 'Thursday', 'Friday', 'Saturday']
+
+
+class Problem:
+    """Index-based snapshot of everything a generation run needs.
+
+    Placements are ``(section, subject, room, faculty, cell)`` index tuples;
+    ``-1`` stands for "none" (e.g. a kept entry whose faculty was removed).
+    """
+
+    __slots__ = (
+        'section_ids', 'section_size', 'section_department', 'section_subjects',
+        'subject_ids', 'subject_quota', 'subject_department', 'subject_is_lab',
+        'room_ids', 'room_capacity', 'room_is_lab', 'room_available', 'section_rooms',
+        'faculty_ids', 'faculty_department', 'department_faculty', 'faculty_busy',
+        'faculty_max_day', 'faculty_max_week',
+        'cell_day', 'cell_day_index', 'cell_slot', 'day_cells', 'prev_cell', 'next_cell',
+        'scope', 'scope_ids', 'kept', 'fixed', 'previous', 'rules',
+    )
+
+    def __init__(self):
+        self.section_ids = []
+        self.section_size = array('i')
+        self.section_department = array('i')
+        self.section_subjects = []  # per section: subject indices, in id order
+
+        self.subject_ids = []
+        self.subject_quota = array('i')
+        self.subject_department = array('i')
+        self.subject_is_lab = bytearray()
+
+        self.room_ids = []
+        self.room_capacity = array('i')
+        self.room_is_lab = bytearray()
+        self.room_available = bytearray()  # 0 for unavailable rooms pinned by a FixedSlot
+        self.section_rooms = []  # per section: (rooms for theory, rooms for labs), best fit first
+
+        self.faculty_ids = []
+        self.faculty_department = array('i')
+        self.department_faculty = []  # per department: faculty indices, in id order
+        self.faculty_busy = []        # per faculty: bitmask with bit ``cell`` set when marked busy
+        self.faculty_max_day = array('i')
+        self.faculty_max_week = array('i')
+
+        self.cell_day = []
+        self.cell_day_index = array('i')  # position of the cell's day in DAYS
+        self.cell_slot = array('q')
+        self.day_cells = []  # per day in DAYS order: cell indices by start time
+        self.prev_cell = array('i')
+        self.next_cell = array('i')
+
+        self.scope = []        # section indices to (re)generate
+        self.scope_ids = None  # their database ids, or None for a full rebuild
+        self.kept = []         # placements outside the scope, held fixed
+        self.fixed = []        # FixedSlot placements inside the scope, saved with is_fixed=True
+        self.previous = []     # repair runs: the scope's placements in the base version
+        self.rules = {}        # active constraint rule types -> weight, see timetable.constraints
+
+    @property
+    def n_cells(self):
+        return len(self.cell_day)
+
+    def rooms_for(self, section, subject):
+        """Rooms that can host ``subject`` for ``section``, smallest sufficient first."""
+        return self.section_rooms[section][self.subject_is_lab[subject]]
+
+    def faculty_available(self, faculty, cell):
+        return not self.faculty_busy[faculty] & (1 << cell)
+
+    def room_suits(self, room, subject):
+        return self.room_is_lab[room] or not self.subject_is_lab[subject]
+
+    def entry(self, placement, is_fixed=False):
+        """Build an unsaved :class:`TimetableEntry` from an index placement."""
+        section, subject, room, faculty, cell = placement
+        return TimetableEntry(
+            subject_id=self.subject_ids[subject],
+            section_id=self.section_ids[section],
+            classroom_id=self.room_ids[room],
+            faculty_id=self.faculty_ids[faculty] if faculty >= 0 else None,
+            timeslot_id=self.cell_slot[cell],
+            day=self.cell_day[cell],
+            is_fixed=is_fixed
+        )
+
+
+def compile_problem(section_ids=None, department_id=None, base_version_id=None, repair=False):
+    """Load the database state into a :class:`Problem` in a fixed number of queries.
+
+    ``section_ids`` / ``department_id`` restrict :attr:`Problem.scope`; the
+    entries of every other section in ``base_version_id`` are compiled into
+    :attr:`Problem.kept`. With ``repair`` the scope's own (non-fixed) entries
+    in that version are compiled into :attr:`Problem.previous`. The scope's
+    ``FixedSlot`` rows are compiled into :attr:`Problem.fixed`, and the
+    active constraint rules into :attr:`Problem.rules`.
+    """
+    problem = Problem()
+    problem.rules = active_rules()
+    departments = {}
+
+    def department(pk):
+        return departments.setdefault(pk, len(departments))
+
+    subject_index = {}
+    subjects_by_group = defaultdict(list)
+    for subject in Subject.objects.order_by('id'):
+        index = len(problem.subject_ids)
+        subject_index[subject.id] = index
+        problem.subject_ids.append(subject.id)
+        problem.subject_quota.append(subject.classes_per_week)
+        problem.subject_department.append(department(subject.department_id))
+        problem.subject_is_lab.append(subject.subject_type == 'lab')
+        subjects_by_group[(subject.semester_id, subject.department_id)].append(index)
+
+    section_index = {}
+    for section in Section.objects.order_by('id'):
+        index = len(problem.section_ids)
+        section_index[section.id] = index
+        problem.section_ids.append(section.id)
+        problem.section_size.append(section.student_count)
+        problem.section_department.append(department(section.department_id))
+        problem.section_subjects.append(subjects_by_group.get((section.semester_id, section.department_id), []))
+        if (section_ids is None or section.id in section_ids) and \
+                (department_id is None or section.department_id == department_id):
+            problem.scope.append(index)
+
+    # Unavailable rooms are only loaded when a FixedSlot pins a class there;
+    # they are kept out of the eligibility index.
+    room_index = {}
+    rooms = Classroom.objects.filter(Q(is_available=True) | Q(fixedslot__isnull=False)).distinct()
+    for room in rooms.order_by('id'):
+        room_index[room.id] = len(problem.room_ids)
+        problem.room_ids.append(room.id)
+        problem.room_capacity.append(room.capacity)
+        problem.room_is_lab.append(room.room_type == 'lab')
+        problem.room_available.append(room.is_available)
+
+    # Eligibility index: sections of the same size share one pair of lists.
+    eligible_by_size = {}
+    for size in problem.section_size:
+        if size not in eligible_by_size:
+            eligible_by_size[size] = (_best_fit(problem, size, lab=False), _best_fit(problem, size, lab=True))
+        problem.section_rooms.append(eligible_by_size[size])
+
+    faculty_index = {}
+    faculty_by_department = defaultdict(list)
+    faculty_rows = Faculty.objects.order_by('id').values_list(
+        'id', 'department_id', 'max_classes_per_day', 'max_classes_per_week'
+    )
+    for faculty_id, department_pk, max_per_day, max_per_week in faculty_rows:
+        index = len(problem.faculty_ids)
+        faculty_index[faculty_id] = index
+        problem.faculty_ids.append(faculty_id)
+        problem.faculty_department.append(department(department_pk))
+        problem.faculty_max_day.append(max_per_day)
+        problem.faculty_max_week.append(max_per_week)
+        faculty_by_department[departments[department_pk]].append(index)
+    problem.department_faculty = [faculty_by_department[d] for d in range(len(departments))]
+
+    # TimeSlot.day stores the lowercase choice value ('monday'), entries use
+    # the display name ('Monday'), so slots are grouped case-insensitively.
+    slots_by_day = defaultdict(list)
+    slots = TimeSlot.objects.filter(is_break=False).order_by('start_time').values_list('id', 'day', 'start_time')
+    for slot_id, day, start_time in slots:
+        slots_by_day[day.lower()].append((slot_id, start_time))
+
+    cell_index = {}
+    cell_by_time = {}
+    for day_index, day in enumerate(DAYS):
+        cells = []
+        day_slots = slots_by_day.get(day.lower(), ())
+        for position, (slot_id, start_time) in enumerate(day_slots):
+            cell = problem.n_cells
+            cell_index[(day, slot_id)] = cell
+            cell_by_time[(day.lower(), start_time)] = cell
+            problem.cell_day.append(day)
+            problem.cell_day_index.append(day_index)
+            problem.cell_slot.append(slot_id)
+            problem.prev_cell.append(cell - 1 if position > 0 else -1)
+            problem.next_cell.append(cell + 1 if position < len(day_slots) - 1 else -1)
+            cells.append(cell)
+        problem.day_cells.append(cells)
+
+    # Busy periods from the availability matrix, one bit per cell
+    problem.faculty_busy = [0] * len(problem.faculty_ids)
+    busy = FacultyAvailability.objects.filter(is_available=False).values_list('faculty_id', 'day', 'start_time')
+    for faculty_pk, day, start_time in busy:
+        cell = cell_by_time.get((day.lower(), start_time))
+        if cell is not None and faculty_pk in faculty_index:
+            problem.faculty_busy[faculty_index[faculty_pk]] |= 1 << cell
+
+    def placements(entries):
+        for section_pk, subject_pk, room_pk, faculty_pk, slot_id, day in entries.order_by('id').values_list(
+                'section_id', 'subject_id', 'classroom_id', 'faculty_id', 'timeslot_id', 'day'):
+            cell = cell_index.get((day, slot_id))
+            if cell is None:
+                continue
+            yield (
+                section_index[section_pk],
+                subject_index[subject_pk],
+                room_index.get(room_pk, -1),
+                faculty_index.get(faculty_pk, -1),
+                cell,
+            )
+
+    base_entries = TimetableEntry.objects.filter(version_id=base_version_id)
+    if section_ids is not None or department_id is not None:
+        problem.scope_ids = {problem.section_ids[s] for s in problem.scope}
+        problem.kept = list(placements(base_entries.exclude(section_id__in=problem.scope_ids)))
+        if repair:
+            problem.previous = list(placements(base_entries.filter(section_id__in=problem.scope_ids, is_fixed=False)))
+    elif repair:
+        problem.previous = list(placements(base_entries.filter(is_fixed=False)))
+
+    # Fixed slots are placed before the search starts; a section keeps only
+    # the first fixed slot it gets for any one cell.
+    in_scope = set(problem.scope)
+    taken = set()
+    fixed = FixedSlot.objects.order_by('id').values_list(
+        'section_id', 'subject_id', 'classroom_id', 'faculty_id', 'timeslot_id', 'timeslot__day'
+    )
+    for section_pk, subject_pk, room_pk, faculty_pk, slot_id, day in fixed:
+        section = section_index[section_pk]
+        cell = cell_index.get((day.capitalize(), slot_id))
+        if section not in in_scope or cell is None or (section, cell) in taken:
+            continue
+        taken.add((section, cell))
+        problem.fixed.append((
+            section, subject_index[subject_pk], room_index[room_pk], faculty_index[faculty_pk], cell
+        ))
+
+    return problem
+
+
+def fingerprint(problem, *params):
+    """Stable SHA-256 of everything the solver reads, plus ``params``.
+
+    The compiled problem already holds sections, subjects, rooms, faculty,
+    time slots, availability, fixed slots, kept entries and active rules in
+    id order, so hashing it costs no extra queries. Runs with equal
+    fingerprints (and equal ``params`` such as the seed) produce the same
+    timetable. ``section_rooms`` is left out: it follows from the room and
+    section attributes, and with thousands of rooms it is by far the largest
+    attribute to hash.
+    """
+    digest = hashlib.sha256()
+    for name in Problem.__slots__:
+        if name == 'section_rooms':
+            continue
+        value = getattr(problem, name)
+        if isinstance(value, dict):
+            value = sorted(value.items())
+        elif isinstance(value, set):
+            value = sorted(value)
+        digest.update(f'{name}={value!r};'.encode())
+    digest.update(repr(params).encode())
+    return digest.hexdigest()
+
+
+def _best_fit(problem, size, lab):
+    """Rooms big enough for ``size`` students, tightest capacity first.
+
+    Lab subjects only go to labs. Theory subjects prefer ordinary
+    classrooms and overflow into labs, so labs and large halls stay free for
+    the sessions that need them.
+    """
+    rooms = [
+        r for r in range(len(problem.room_ids))
+        if problem.room_available[r] and problem.room_capacity[r] >= size
+        and (problem.room_is_lab[r] or not lab)
+    ]
+    rooms.sort(key=lambda r: (problem.room_is_lab[r] != lab, problem.room_capacity[r], r))
+    return tuple(rooms)
@@ -0,0 +1,30 @@
+from django.contrib.auth import get_user_model
+from django.db.models.signals import post_save, post_delete
+
+from core.models import Department, Classroom, Section, Subject
+from faculty.models import Faculty
+from scheduler.models import TimeSlot
+from .grid import bump_render_revision
+from .models import TimetableEntry
+
+# What a rendered timetable displays besides the entries themselves. Entry
+# rows are only written in bulk into new versions, so the version id in the
+# cache key covers them; single saves (e.g. in the admin) still bump.
+for model in (Department, Classroom, Section, Subject, Faculty, TimeSlot):
+    post_save.connect(bump_render_revision, sender=model, dispatch_uid=f'render_revision_save_{model.__name__}')
+    post_delete.connect(bump_render_revision, sender=model, dispatch_uid=f'render_revision_delete_{model.__name__}')
+
+post_save.connect(bump_render_revision, sender=TimetableEntry, dispatch_uid='render_revision_save_TimetableEntry')
+# Entry deletes have no receiver (it would turn off fast cascade deletes when
+# old versions are pruned); TimetableEntryAdmin bumps for the deletes it makes.
+
+
+def bump_on_user_change(sender, created, update_fields=None, **kwargs):
+    """Faculty emails show in rendered grids; saves that leave the email out
+    (logins write ``last_login`` and ``login_count``) change nothing shown."""
+    if created or (update_fields is not None and 'email' not in update_fields):
+        return
+    bump_render_revision()
+
+
+post_save.connect(bump_on_user_change, sender=get_user_model(), dispatch_uid='render_revision_save_User')
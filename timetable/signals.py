@@ -0,0 +1,5 @@
+from django.dispatch import Signal
+
+# Sent with ``version`` once a TimetableVersion.publish() has committed.
+# Publishing only runs UPDATEs, so post_save never fires for it.
+timetable_published = Signal()
@@ -0,0 +1,623 @@
+"""
+Timetable generation engine.
+
+The database state is compiled once into an index-based
+:class:`~timetable.problem.Problem` (see :mod:`timetable.problem`). Clash
+checks are answered from flat occupancy bytearrays indexed by
+``cell * n + resource``, so the number of queries a run issues does not grow
+with the size of the institution and the placement loop allocates nothing.
+"""
+from array import array
+from collections import defaultdict
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from heapq import heapify, heappop, heappush
+from itertools import chain
+
+import django
+from django.conf import settings
+from django.db import connection, connections, transaction
+from django.utils import timezone
+
+from .constraints import HARD, build_constraints
+from .models import TimetableEntry, TimetableVersion, CachedSolution
+from .problem import compile_problem, fingerprint
+
+
+class Occupancy:
+    """Tracks which rooms, faculty members and sections are busy in each cell.
+
+    Each resource kind is one flat bytearray with a byte per
+    ``(cell, resource)`` pair, so every clash check is a single index.
+    Faculty workload is counted alongside, per ``faculty * n_days + day``
+    and per week.
+    """
+
+    __slots__ = (
+        'rooms', 'faculty', 'sections', 'n_rooms', 'n_faculty', 'n_sections',
+        'faculty_day_load', 'faculty_week_load', 'n_days', 'cell_day_index',
+    )
+
+    def __init__(self, problem):
+        self.n_rooms = len(problem.room_ids)
+        self.n_faculty = len(problem.faculty_ids)
+        self.n_sections = len(problem.section_ids)
+        self.n_days = len(problem.day_cells)
+        self.cell_day_index = problem.cell_day_index
+        self.rooms = bytearray(problem.n_cells * self.n_rooms)
+        self.faculty = bytearray(problem.n_cells * self.n_faculty)
+        self.sections = bytearray(problem.n_cells * self.n_sections)
+        self.faculty_day_load = array('i', bytes(4 * self.n_faculty * self.n_days))
+        self.faculty_week_load = array('i', bytes(4 * self.n_faculty))
+
+    def room_free(self, cell, room):
+        return not self.rooms[cell * self.n_rooms + room]
+
+    def faculty_free(self, cell, faculty):
+        return not self.faculty[cell * self.n_faculty + faculty]
+
+    def section_free(self, cell, section):
+        return not self.sections[cell * self.n_sections + section]
+
+    def book(self, cell, room, faculty, section):
+        if room >= 0:
+            self.rooms[cell * self.n_rooms + room] = 1
+        if faculty >= 0:
+            self.faculty[cell * self.n_faculty + faculty] = 1
+            self.faculty_day_load[faculty * self.n_days + self.cell_day_index[cell]] += 1
+            self.faculty_week_load[faculty] += 1
+        self.sections[cell * self.n_sections + section] = 1
+
+    @classmethod
+    def seeded(cls, problem):
+        """Occupancy with the problem's kept and fixed placements already booked."""
+        occupancy = cls(problem)
+        for placements in (problem.kept, problem.fixed):
+            for section, subject, room, faculty, cell in placements:
+                occupancy.book(cell, room, faculty, section)
+        return occupancy
+
+
+class GenerationResult:
+    """Unsaved entries produced by a run plus the numbers needed to judge it.
+
+    ``section_ids`` is the set of sections the run regenerated, or ``None``
+    when the whole institution was rebuilt; a scoped run copies every other
+    section from ``base_version_id``. ``fingerprint`` identifies the inputs;
+    ``from_cache`` is set when the entries were restored instead of solved,
+    and ``version_id`` is then the version already saved from them, if any.
+    ``changed_cells`` counts the (section, cell) pairs a repair run changed,
+    and ``conflicted`` the solved entries that still break a hard rule
+    (``None`` for a restored result).
+    """
+
+    def __init__(self, entries, required_slots, section_ids=None, fingerprint=None, from_cache=False,
+                 base_version_id=None, changed_cells=None, conflicted=None, version_id=None):
+        self.entries = entries
+        self.required_slots = required_slots
+        self.section_ids = section_ids
+        self.fingerprint = fingerprint
+        self.from_cache = from_cache
+        self.base_version_id = base_version_id
+        self.changed_cells = changed_cells
+        self.conflicted = conflicted
+        self.version_id = version_id
+
+    @property
+    def is_complete(self):
+        return len(self.entries) >= self.required_slots
+
+
+def generate(progress=None, workers=None, section_ids=None, department_id=None,
+             time_limit=None, seed=None, force=False, base_version=None, repair=False):
+    """Run the generator and return a :class:`GenerationResult`.
+
+    ``progress``, if given, is called as ``progress(sections_done, sections_total, phase)``
+    after each section has been placed and once more when optimization starts.
+    While optimizing it is also called about once a second with the keyword
+    arguments ``best_score`` (weighted violations), ``unfilled_slots`` (cells
+    without a valid class) and ``eta_seconds``.
+    With ``workers`` > 1 a full rebuild solves departments in parallel
+    processes (see :func:`_solve_parallel`); scoped and repair runs are
+    always solved in this process.
+
+    Passing ``section_ids`` and/or ``department_id`` limits the run to those
+    sections. Every other entry of ``base_version`` (the published version
+    by default) is kept and booked as occupied capacity first, so only the
+    affected sections change. ``FixedSlot`` rows are pre-placed the same way
+    and saved with ``is_fixed=True``.
+
+    With ``repair`` the run starts from the scope's own entries in
+    ``base_version`` instead of an empty week: entries that are still valid
+    stay exactly as they are, and only the cells they leave open are placed
+    again (see :func:`_place_sections`). Use it after a teacher leaves or a
+    room closes to change as few cells as possible.
+
+    The greedy result is then improved by :mod:`timetable.optimizer` for
+    ``time_limit`` seconds (``TIMETABLE_OPTIMIZE_SECONDS`` by default);
+    ``seed`` makes that search reproducible. Repair and scoped runs skip
+    the search when the greedy result breaks no hard rule.
+
+    When a :class:`CachedSolution` exists for the same input fingerprint,
+    time limit, seed and solving mode (serial or parallel), its entries are
+    restored instead of solving again, unless ``force`` is set. Use
+    :func:`save_result` to store a fresh result in that cache.
+    """
+    from .optimizer import conflict_count, optimize
+
+    if workers is None:
+        workers = getattr(settings, 'TIMETABLE_GENERATION_WORKERS', 1)
+    if time_limit is None:
+        time_limit = getattr(settings, 'TIMETABLE_OPTIMIZE_SECONDS', 0)
+
+    base_version_id = None
+    if repair or section_ids is not None or department_id is not None:
+        if base_version is None:
+            base_version = TimetableVersion.published()
+        base_version_id = base_version.pk if base_version else None
+
+    problem = compile_problem(section_ids=section_ids, department_id=department_id, base_version_id=base_version_id,
+                              repair=repair)
+    required_slots = problem.n_cells * len(problem.scope)
+    parallel = workers > 1 and problem.scope_ids is None and not repair
+    key = fingerprint(problem, time_limit, seed, parallel)
+
+    if not force:
+        cached = CachedSolution.objects.filter(fingerprint=key).values_list('assignment', 'version_id').first()
+        if cached is not None:
+            assignment, version_id = cached
+            return GenerationResult(
+                _restore(assignment), required_slots, section_ids=problem.scope_ids, fingerprint=key,
+                from_cache=True, base_version_id=base_version_id, version_id=version_id
+            )
+
+    occupancy = Occupancy.seeded(problem)
+
+    if parallel:
+        placements = _solve_parallel(problem, workers, progress)
+    else:
+        placements = _place_sections(problem, problem.scope, occupancy=occupancy, progress=progress)
+
+    if time_limit > 0:
+        report = None
+        if progress:
+            total = len(problem.scope)
+            progress(total, total, 'optimizing')
+            empty = required_slots - len(problem.fixed) - len(placements)
+
+            def report(best_cost, conflicted, seconds_left):
+                progress(total, total, 'optimizing', best_score=best_cost, unfilled_slots=max(empty, 0) + conflicted,
+                         eta_seconds=seconds_left)
+        placements = optimize(problem, placements, time_limit, seed=seed, progress=report)
+
+    entries = [problem.entry(placement, is_fixed=True) for placement in problem.fixed]
+    entries += [problem.entry(placement) for placement in placements]
+    return GenerationResult(entries, required_slots, section_ids=problem.scope_ids, fingerprint=key,
+                            base_version_id=base_version_id,
+                            changed_cells=_changed_cells(problem.previous, placements) if repair else None,
+                            conflicted=conflict_count(problem, placements))
+
+
+def _changed_cells(previous, placements):
+    """Number of (section, cell) pairs whose subject, room or faculty differ."""
+    before = {(section, cell): (subject, room, faculty) for section, subject, room, faculty, cell in previous}
+    after = {(section, cell): (subject, room, faculty) for section, subject, room, faculty, cell in placements}
+    return sum(1 for key in before.keys() | after.keys() if before.get(key) != after.get(key))
+
+
+def _restore(assignment):
+    return [
+        TimetableEntry(section_id=section_id, subject_id=subject_id, classroom_id=classroom_id,
+                       faculty_id=faculty_id, timeslot_id=timeslot_id, day=day, is_fixed=is_fixed)
+        for section_id, subject_id, classroom_id, faculty_id, timeslot_id, day, is_fixed in assignment
+    ]
+
+
+def _place_sections(problem, sections, occupancy=None, progress=None, booked=()):
+    """Greedy placement of ``sections`` (indices into ``problem``).
+
+    Rooms are taken from the problem's best-fit eligibility index, so the
+    first free room is also the smallest one that is big enough. Cells taken
+    by a fixed slot are skipped, and faculty members who marked a cell busy
+    are rejected with one AND against their availability bitmask.
+
+    Faculty candidates come from one heap per department ordered by
+    remaining weekly capacity, so load is spread evenly. A member who reaches
+    ``max_classes_per_week`` is simply not pushed back, and the per-day limit
+    is a single counter lookup. Hard constraint checkers that occupancy does
+    not already guarantee (e.g. an opted-in ``lab_timing``) screen each
+    candidate before it is booked.
+
+    Weekly quotas are soft: when a section has used up every quota, a
+    cell is filled by going over one, never by breaking a hard rule. A cell
+    for which no room, teacher or subject is valid is left empty rather than
+    double-booked.
+
+    Repair runs first book every placement of ``problem.previous`` that is
+    still valid, unchanged. A cell whose previous placement had to go tries
+    its previous subject first, so usually only its room or teacher moves.
+
+    ``booked`` placements are already in ``occupancy`` (the parallel merge
+    passes what it kept); like fixed slots they count towards quotas and
+    hard rules, and only the cells they leave open are placed.
+
+    Returns ``(section, subject, room, faculty, cell)`` index tuples, which
+    are also cheap to send back from a worker process.
+    """
+    if occupancy is None:
+        occupancy = Occupancy.seeded(problem)
+    if not problem.room_ids or not problem.faculty_ids:
+        return []
+
+    # Subjects already in place (fixed slots, kept repair placements) per cell and section
+    fixed_subject = {}
+    fixed_by_section = defaultdict(list)
+    for section, subject, _, _, cell in chain(problem.fixed, booked):
+        fixed_subject[(section, cell)] = subject
+        fixed_by_section[section].append(subject)
+
+    room_busy, n_rooms = occupancy.rooms, occupancy.n_rooms
+    faculty_busy, n_faculty = occupancy.faculty, occupancy.n_faculty
+    section_busy, n_sections = occupancy.sections, occupancy.n_sections
+    subject_quota, subject_is_lab = problem.subject_quota, problem.subject_is_lab
+    subject_department, department_faculty = problem.subject_department, problem.department_faculty
+    faculty_unavailable = problem.faculty_busy
+    max_day, max_week = problem.faculty_max_day, problem.faculty_max_week
+    day_load, week_load, n_days = occupancy.faculty_day_load, occupancy.faculty_week_load, occupancy.n_days
+    placements = []
+
+    screens = [c for c in build_constraints(problem) if c.weight >= HARD and not c.structural]
+    for placement in booked:
+        for constraint in screens:
+            constraint.delta(placement)
+
+    def room_keeps(room, section, subject, cell):
+        """Whether a repaired cell can keep its previous ``room``."""
+        return room >= 0 and problem.room_available[room] and problem.room_suits(room, subject) \
+            and problem.room_capacity[room] >= problem.section_size[section] \
+            and not room_busy[cell * n_rooms + room]
+
+    def faculty_keeps(faculty, subject, cell):
+        """Whether a repaired cell can keep its previous ``faculty`` member."""
+        return faculty >= 0 and problem.faculty_department[faculty] == subject_department[subject] \
+            and not faculty_unavailable[faculty] & (1 << cell) \
+            and not faculty_busy[cell * n_faculty + faculty] \
+            and day_load[faculty * n_days + problem.cell_day_index[cell]] < max_day[faculty] \
+            and week_load[faculty] < max_week[faculty]
+
+    # Repair: keep still-valid previous placements as they are and remember
+    # (subject, room, faculty) for every cell that has to be placed again.
+    # Only hard rules invalidate a placement; one that merely goes over its
+    # weekly quota (which the optimizer allows) is kept.
+    wanted_cells = {}
+    if problem.previous:
+        in_scope = set(sections)
+        for placement in problem.previous:
+            section, subject, room, faculty, cell = placement
+            if section not in in_scope or subject not in problem.section_subjects[section] \
+                    or section_busy[cell * n_sections + section]:
+                continue
+            valid = (
+                room_keeps(room, section, subject, cell) and faculty_keeps(faculty, subject, cell)
+                and all(constraint.admits(placement) for constraint in screens)
+            )
+            if not valid:
+                wanted_cells[(section, cell)] = (subject, room, faculty)
+                continue
+            placements.append(placement)
+            occupancy.book(cell, room, faculty, section)
+            for constraint in screens:
+                constraint.delta(placement)
+            fixed_subject[(section, cell)] = subject
+            fixed_by_section[section].append(subject)
+
+    # (-remaining weekly capacity, faculty) per department
+    faculty_heaps = []
+    for members in department_faculty:
+        heap = [(week_load[f] - max_week[f], f) for f in members if week_load[f] < max_week[f]]
+        heapify(heap)
+        faculty_heaps.append(heap)
+
+    for index, section in enumerate(sections, start=1):
+        subjects = problem.section_subjects[section]
+        eligible_rooms = problem.section_rooms[section]
+
+        # Track subject weekly usage, starting from the section's fixed slots
+        subject_usage = {s: 0 for s in subjects}
+        for subject in fixed_by_section.get(section, ()):
+            if subject in subject_usage:
+                subject_usage[subject] += 1
+
+        for day, day_cells in enumerate(problem.day_cells):
+
+            previous_subject = -1
+
+            for cell in day_cells:
+                if section_busy[cell * n_sections + section]:
+                    previous_subject = fixed_subject.get((section, cell), -1)
+                    continue
+
+                room_base = cell * n_rooms
+                faculty_base = cell * n_faculty
+                cell_bit = 1 << cell
+                assigned = False
+
+                # Try subjects in rotation, a repaired cell's previous subject first.
+                # The weekly quota is soft: once every subject has used its quota the
+                # rotation runs again ignoring it, but rooms and faculty are still
+                # chosen under every hard rule. A cell with no valid candidate stays empty.
+                order = subjects
+                wanted = wanted_cells.get((section, cell))
+                if wanted:
+                    order = [wanted[0]] + [s for s in subjects if s != wanted[0]]
+                for within_quota in (True, False):
+                    for subject in order:
+                        keeps = wanted is not None and subject == wanted[0]
+
+                        # Avoid consecutive same subject
+                        if previous_subject == subject:
+                            continue
+
+                        if within_quota and subject_usage[subject] >= subject_quota[subject]:
+                            continue
+
+                        # Room allocation
+                        room = -1
+                        if keeps and room_keeps(wanted[1], section, subject, cell):
+                            room = wanted[1]
+                        for r in eligible_rooms[subject_is_lab[subject]] if room < 0 else ():
+                            if not room_busy[room_base + r]:
+                                room = r
+                                break
+
+                        if room < 0:
+                            continue
+
+                        # Faculty allocation, most remaining weekly capacity first
+                        faculty_member = -1
+                        heap = faculty_heaps[subject_department[subject]]
+                        skipped = []
+                        from_heap = not (keeps and faculty_keeps(wanted[2], subject, cell))
+                        if not from_heap:
+                            # Its heap entry goes stale and is re-queued when popped
+                            faculty_member = wanted[2]
+                        while heap and faculty_member < 0:
+                            candidate = heappop(heap)
+                            f = candidate[1]
+                            if candidate[0] != week_load[f] - max_week[f]:
+                                # Stale after a booking made outside the heap: re-queue with the true capacity
+                                if week_load[f] < max_week[f]:
+                                    heappush(heap, (week_load[f] - max_week[f], f))
+                                continue
+                            if faculty_busy[faculty_base + f] or faculty_unavailable[f] & cell_bit \
+                                    or day_load[f * n_days + day] >= max_day[f]:
+                                skipped.append(candidate)
+                                continue
+                            faculty_member = f
+                            break
+                        for candidate in skipped:
+                            heappush(heap, candidate)
+
+                        if faculty_member < 0:
+                            continue
+
+                        placement = (section, subject, room, faculty_member, cell)
+                        if screens and not all(constraint.admits(placement) for constraint in screens):
+                            if from_heap:
+                                heappush(heap, (week_load[faculty_member] - max_week[faculty_member], faculty_member))
+                            continue
+
+                        placements.append(placement)
+                        occupancy.book(cell, room, faculty_member, section)
+                        for constraint in screens:
+                            constraint.delta(placement)
+                        if from_heap and week_load[faculty_member] < max_week[faculty_member]:
+                            heappush(heap, (week_load[faculty_member] - max_week[faculty_member], faculty_member))
+
+                        subject_usage[subject] += 1
+                        previous_subject = subject
+                        assigned = True
+                        break
+
+                    if assigned:
+                        break
+                if not assigned:
+                    previous_subject = -1
+
+        if progress:
+            progress(index, len(sections), 'solving')
+
+    return placements
+
+
+# ----------------------------------------------------------
+# PARALLEL (PER-DEPARTMENT) GENERATION
+# ----------------------------------------------------------
+
+def _solve_parallel(problem, workers, progress=None):
+    """Solve each department in its own process, then merge the results.
+
+    Sections and faculty never cross department boundaries, so the only
+    shared resource is the classroom pool. Before the run every department
+    gets its own share of the rooms (see :func:`_room_quotas`) and is solved
+    with the other departments' rooms booked, so the results do not collide;
+    :func:`_merge_departments` re-places whatever a share could not seat.
+    """
+    by_department = {}
+    for section in problem.scope:
+        by_department.setdefault(problem.section_department[section], []).append(section)
+    department_order = sorted(by_department)
+    quotas = _room_quotas(problem, by_department)
+
+    # Forked children must not reuse the parent's database connection.
+    connections.close_all()
+
+    results = {}
+    done = 0
+    with ProcessPoolExecutor(max_workers=workers, initializer=django.setup) as executor:
+        futures = {
+            executor.submit(_solve_department, problem, by_department[department], quotas[department]): department
+            for department in department_order
+        }
+        for future in as_completed(futures):
+            department = futures[future]
+            results[department] = future.result()
+            done += len(by_department[department])
+            if progress:
+                progress(done, len(problem.scope), 'solving')
+
+    return _merge_departments(problem, [results[department] for department in department_order])
+
+
+def _room_quotas(problem, by_department):
+    """Deal the rooms out to departments in proportion to their sections.
+
+    Lab rooms and classrooms are dealt separately, largest first, each to the
+    department holding the smallest share so far, so every department gets a
+    similar mix of sizes. Returns ``{department: set of room indices}``.
+    """
+    quotas = {department: set() for department in by_department}
+    for is_lab in (1, 0):
+        rooms = [r for r in range(len(problem.room_ids)) if problem.room_is_lab[r] == is_lab]
+        rooms.sort(key=lambda r: (-problem.room_capacity[r], r))
+        dealt = dict.fromkeys(by_department, 0)
+        for room in rooms:
+            department = min(dealt, key=lambda d: (dealt[d] / len(by_department[d]), d))
+            dealt[department] += 1
+            quotas[department].add(room)
+    return quotas
+
+
+def _solve_department(problem, sections, rooms):
+    """Place one department's ``sections`` using only the room indices in ``rooms``."""
+    occupancy = Occupancy(problem)
+    # Other departments' rooms are booked in every cell, before the fixed slots
+    occupancy.rooms[:] = bytes(r not in rooms for r in range(occupancy.n_rooms)) * problem.n_cells
+    for placements in (problem.kept, problem.fixed):
+        for section, subject, room, faculty, cell in placements:
+            occupancy.book(cell, room, faculty, section)
+    return _place_sections(problem, sections, occupancy=occupancy)
+
+
+def _merge_departments(problem, department_placements):
+    """Combine per-department results without double-booking anything.
+
+    An entry whose room is already taken moves to the next free room in its
+    best-fit list and is dropped when there is none. The greedy pass then
+    fills every cell left open, by a dropped entry or by a department whose
+    rooms ran out, from the whole room pool; a cell it cannot fill stays
+    empty.
+    """
+    occupancy = Occupancy.seeded(problem)
+    merged = []
+
+    for placements in department_placements:
+        for section, subject, room, faculty, cell in placements:
+
+            if not occupancy.room_free(cell, room):
+                room = next((r for r in problem.rooms_for(section, subject) if occupancy.room_free(cell, r)), -1)
+                if room < 0:
+                    continue
+
+            merged.append((section, subject, room, faculty, cell))
+            occupancy.book(cell, room, faculty, section)
+
+    filled = defaultdict(int)
+    for placement in chain(problem.fixed, merged):
+        filled[placement[0]] += 1
+    open_sections = [section for section in problem.scope if filled[section] < problem.n_cells]
+    if open_sections:
+        merged += _place_sections(problem, open_sections, occupancy=occupancy, booked=merged)
+    return merged
+
+
+# TimetableEntry columns copied as they are by copy_entries()
+ENTRY_COPY_COLUMNS = ('day', 'timeslot_id', 'subject_id', 'classroom_id', 'section_id', 'faculty_id', 'is_fixed')
+
+
+def save_entries(entries, version, batch_size=None):
+    """Insert ``entries`` into ``version`` with chunked INSERTs.
+
+    The solver runs without touching the database, so this is one short
+    write at the very end. Other versions, including the published one,
+    are never modified.
+    """
+    if batch_size is None:
+        batch_size = getattr(settings, 'TIMETABLE_BULK_BATCH_SIZE', 500)
+
+    for entry in entries:
+        entry.version = version
+    TimetableEntry.objects.bulk_create(entries, batch_size=batch_size)
+
+
+def copy_entries(from_version_id, version, exclude_sections=()):
+    """Copy the entries of another version into ``version`` inside the database.
+
+    One ``INSERT ... SELECT``, so the rows of a scoped run's untouched
+    sections never pass through Python.
+    """
+    qn = connection.ops.quote_name
+    table = qn(TimetableEntry._meta.db_table)
+    columns = ', '.join(qn(column) for column in ENTRY_COPY_COLUMNS)
+    sql = (
+        f"INSERT INTO {table} ({qn('version_id')}, {columns}) "
+        f"SELECT %s, {columns} FROM {table} WHERE {qn('version_id')} = %s"
+    )
+    params = [version.pk, from_version_id]
+    if exclude_sections:
+        sql += f" AND {qn('section_id')} NOT IN ({', '.join(['%s'] * len(exclude_sections))})"
+        params += sorted(exclude_sections)
+    with connection.cursor() as cursor:
+        cursor.execute(sql, params)
+
+
+def save_result(result, user=None, label='', batch_size=None):
+    """Save a :class:`GenerationResult` as a new draft version and return it.
+
+    A scoped run's draft also gets a copy of every other section from the
+    base version, so each version is a complete timetable. The result is
+    remembered under its fingerprint; the cache keeps the
+    ``TIMETABLE_RESULT_CACHE_SIZE`` most recently used solutions.
+
+    A result restored from the cache returns the version already saved
+    from it while that version exists, so repeated runs on unchanged inputs
+    neither write entries nor push older versions out of
+    ``TIMETABLE_VERSIONS_KEPT``.
+    """
+    if result.from_cache and result.version_id is not None:
+        version = TimetableVersion.objects.filter(pk=result.version_id).first()
+        if version is not None:
+            CachedSolution.objects.filter(fingerprint=result.fingerprint).update(last_used_at=timezone.now())
+            return version
+
+    with transaction.atomic():
+        version = TimetableVersion.objects.create(created_by=user, label=label)
+
+        if result.section_ids is not None and result.base_version_id is not None:
+            copy_entries(result.base_version_id, version, exclude_sections=result.section_ids)
+
+        save_entries(result.entries, version, batch_size=batch_size)
+        TimetableVersion.prune()
+
+        if result.fingerprint is None:
+            return version
+
+        if result.from_cache:
+            CachedSolution.objects.filter(fingerprint=result.fingerprint).update(
+                version=version, last_used_at=timezone.now()
+            )
+        else:
+            assignment = [
+                [e.section_id, e.subject_id, e.classroom_id, e.faculty_id, e.timeslot_id, e.day, e.is_fixed]
+                for e in result.entries
+            ]
+            CachedSolution.objects.update_or_create(
+                fingerprint=result.fingerprint,
+                defaults={'assignment': assignment, 'required_slots': result.required_slots, 'version': version},
+            )
+
+        keep = getattr(settings, 'TIMETABLE_RESULT_CACHE_SIZE', 20)
+        stale = list(CachedSolution.objects.values_list('pk', flat=True)[keep:])
+        if stale:
+            CachedSolution.objects.filter(pk__in=stale).delete()
+
+    return version
@@ -1,3 +1,579 @@
-from django.test import TestCase
+import datetime
+import time
 
-# Create your tests here.
+from django.contrib import admin
+from django.contrib.auth import get_user_model
+from django.test import TestCase, override_settings
+from django.utils import timezone
+
+from core.models import Department, Semester, Section, Subject, Classroom
+from scheduler.models import TimeSlot, FixedSlot, ConstraintRule
+from faculty.models import Faculty, FacultyAvailability
+from . import jobs
+from .admin import TimetableEntryAdmin
+from .analytics import build_tensor, daily_load, heatmap, idle_gaps, utilization
+from .constraints import HARD, SOFT, active_rules
+from .grid import grid_rows, render_revision
+from .models import TimetableEntry, TimetableVersion, GenerationJob
+from .optimizer import conflict_count
+from .problem import compile_problem
+from .signals import timetable_published
+from .solver import _merge_departments, _place_sections, generate, save_result
+from .validation import validate_timetable
+
+User = get_user_model()
+
+DAYS = ['monday', 'tuesday', 'wednesday', 'thursday', 'friday']
+
+
+class SolverFixture(TestCase):
+    """Two sections of one department with twenty teaching periods a week and
+    a little more quota than that, so the greedy pass never runs short."""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.department = Department.objects.create(name="Computer Science", code="CSE")
+        semester = Semester.objects.create(number=1, academic_year="2025-26")
+        cls.sections = [
+            Section.objects.create(name=name, semester=semester, department=cls.department, student_count=45)
+            for name in 'AB'
+        ]
+        cls.lab = Subject.objects.create(name="Lab", code="CSE-L", department=cls.department, semester=semester,
+                                         subject_type='lab', classes_per_week=2)
+        cls.subjects = [
+            Subject.objects.create(name=f"Theory {n}", code=f"CSE-T{n}", department=cls.department,
+                                   semester=semester, classes_per_week=quota)
+            for n, quota in enumerate([5, 5, 5, 5], start=1)
+        ]
+
+        cls.rooms = [Classroom.objects.create(name=f"LH-{n}", capacity=50 + n) for n in range(3)]
+        cls.labs = [Classroom.objects.create(name=f"LAB-{n}", capacity=60, room_type='lab') for n in range(2)]
+        cls.closed = Classroom.objects.create(name="LH-CLOSED", capacity=50, is_available=False)
+        cls.small = Classroom.objects.create(name="LH-SMALL", capacity=20)
+
+        cls.faculty = []
+        for n in range(3):
+            user = User.objects.create_user(email=f"teacher{n}@example.com", password="x", role='faculty')
+            cls.faculty.append(Faculty.objects.create(user=user, department=cls.department, designation="Lecturer",
+                                                      employee_id=f"T{n}"))
+
+        # Four periods a day around a lunch break
+        cls.slots = {}
+        for day in DAYS:
+            for hour in (9, 10, 11, 13):
+                cls.slots[day, hour] = TimeSlot.objects.create(
+                    day=day, start_time=datetime.time(hour), end_time=datetime.time(hour, 55)
+                )
+            TimeSlot.objects.create(day=day, start_time=datetime.time(12), end_time=datetime.time(12, 55),
+                                    is_break=True, break_name="Lunch")
+
+        FacultyAvailability.objects.create(faculty=cls.faculty[0], day='monday', start_time=datetime.time(9))
+        cls.fixed = FixedSlot.objects.create(section=cls.sections[0], subject=cls.subjects[0], classroom=cls.rooms[1],
+                                             faculty=cls.faculty[1], timeslot=cls.slots['monday', 10])
+
+    def cell(self, problem, day, hour):
+        return problem.cell_slot.tolist().index(self.slots[day, hour].pk)
+
+
+class CompileProblemTests(SolverFixture):
+
+    def test_indexes_sections_cells_and_scope(self):
+        problem = compile_problem()
+
+        self.assertEqual(problem.section_ids, [section.pk for section in self.sections])
+        self.assertEqual(problem.n_cells, 20)  # breaks are not cells
+        self.assertEqual(problem.scope, [0, 1])
+        self.assertEqual(problem.cell_day[self.cell(problem, 'tuesday', 9)], 'Tuesday')
+
+    def test_eligible_rooms_are_best_fit_and_skip_closed_rooms(self):
+        problem = compile_problem()
+        room = problem.room_ids.index
+
+        theory, labs = problem.section_rooms[0]
+        self.assertEqual(theory, tuple(room(r.pk) for r in self.rooms + self.labs))
+        self.assertEqual(labs, tuple(room(r.pk) for r in self.labs))
+        self.assertNotIn(self.closed.pk, problem.room_ids)
+
+    def test_busy_periods_become_bitmask(self):
+        problem = compile_problem()
+        teacher = problem.faculty_ids.index(self.faculty[0].pk)
+
+        self.assertFalse(problem.faculty_available(teacher, self.cell(problem, 'monday', 9)))
+        self.assertTrue(problem.faculty_available(teacher, self.cell(problem, 'monday', 10)))
+
+    def test_fixed_slots_are_compiled(self):
+        problem = compile_problem()
+
+        self.assertEqual(problem.fixed, [(
+            0, problem.subject_ids.index(self.subjects[0].pk), problem.room_ids.index(self.rooms[1].pk),
+            problem.faculty_ids.index(self.faculty[1].pk), self.cell(problem, 'monday', 10),
+        )])
+
+    def test_scoped_run_keeps_other_sections(self):
+        version = TimetableVersion.objects.create()
+        TimetableEntry.objects.create(version=version, section=self.sections[1], subject=self.subjects[1],
+                                      classroom=self.rooms[0], faculty=self.faculty[2], day='Friday',
+                                      timeslot=self.slots['friday', 13])
+
+        problem = compile_problem(section_ids={self.sections[0].pk}, base_version_id=version.pk)
+
+        self.assertEqual(problem.scope, [0])
+        self.assertEqual(len(problem.kept), 1)
+        self.assertEqual(problem.kept[0][4], self.cell(problem, 'friday', 13))
+
+
+class PlaceSectionsTests(SolverFixture):
+
+    def setUp(self):
+        self.problem = compile_problem()
+        self.placements = _place_sections(self.problem, self.problem.scope)
+
+    def test_fills_every_cell_without_clashes(self):
+        booked = self.placements + self.problem.fixed
+        self.assertEqual(len(booked), 2 * self.problem.n_cells)
+
+        for column in (0, 2, 3):  # section, room, faculty
+            cells = [(placement[4], placement[column]) for placement in booked]
+            self.assertEqual(len(cells), len(set(cells)))
+
+    def test_keeps_fixed_slot(self):
+        section, _, _, _, cell = self.problem.fixed[0]
+        self.assertFalse([p for p in self.placements if p[0] == section and p[4] == cell])
+
+    def test_respects_busy_periods_and_limits(self):
+        problem = self.problem
+        for section, subject, room, faculty, cell in self.placements:
+            self.assertTrue(problem.faculty_available(faculty, cell))
+            self.assertTrue(problem.room_suits(room, subject))
+            self.assertGreaterEqual(problem.room_capacity[room], problem.section_size[section])
+
+        per_day = {}
+        for _, _, _, faculty, cell in self.placements + problem.fixed:
+            key = (faculty, problem.cell_day_index[cell])
+            per_day[key] = per_day.get(key, 0) + 1
+        for (faculty, _), count in per_day.items():
+            self.assertLessEqual(count, problem.faculty_max_day[faculty])
+
+    def test_leaves_cells_empty_rather_than_break_limits(self):
+        Faculty.objects.update(max_classes_per_week=5)
+        problem = compile_problem()
+        placements = _place_sections(problem, problem.scope)
+
+        per_week = {}
+        for _, _, _, faculty, _ in placements + problem.fixed:
+            per_week[faculty] = per_week.get(faculty, 0) + 1
+        self.assertEqual(per_week, {faculty: 5 for faculty in range(3)})
+        for column in (2, 3):
+            cells = [(placement[4], placement[column]) for placement in placements + problem.fixed]
+            self.assertEqual(len(cells), len(set(cells)))
+
+    def test_zero_limit_means_no_classes(self):
+        # e.g. a teacher on leave
+        Faculty.objects.filter(pk=self.faculty[2].pk).update(max_classes_per_week=0)
+        problem = compile_problem()
+        teacher = problem.faculty_ids.index(self.faculty[2].pk)
+
+        self.assertEqual(problem.faculty_max_week[teacher], 0)
+        self.assertNotIn(teacher, [placement[3] for placement in _place_sections(problem, problem.scope)])
+
+    def test_conflict_count_flags_double_booking(self):
+        self.assertEqual(conflict_count(self.problem, self.placements), 0)
+
+        section, _, room, _, cell = self.placements[0]
+        other = next(p for p in self.placements if p[0] != section and p[4] == cell)
+        clashing = [(p[0], p[1], room, p[3], p[4]) if p is other else p for p in self.placements]
+        self.assertEqual(conflict_count(self.problem, clashing), 2)
+
+    def test_stays_within_weekly_quotas(self):
+        problem = self.problem
+        usage = {}
+        for section, subject, _, _, _ in self.placements + problem.fixed:
+            usage[section, subject] = usage.get((section, subject), 0) + 1
+        for (_, subject), count in usage.items():
+            self.assertLessEqual(count, problem.subject_quota[subject])
+
+
+class RepairTests(SolverFixture):
+
+    def setUp(self):
+        self.base = save_result(generate(time_limit=0, force=True))
+        self.base.publish()
+
+    def test_unchanged_inputs_change_nothing(self):
+        result = generate(repair=True, time_limit=1, force=True)
+
+        self.assertEqual(result.changed_cells, 0)
+        self.assertEqual(len(result.entries), 2 * 20)
+
+    def test_keeps_placements_that_only_go_over_quota(self):
+        # The quota is soft, so this alone must not move anything
+        Subject.objects.filter(pk=self.subjects[1].pk).update(classes_per_week=1)
+
+        result = generate(repair=True, time_limit=1, force=True)
+
+        self.assertEqual(result.changed_cells, 0)
+
+    def test_closing_a_room_only_moves_its_classes(self):
+        closed = self.rooms[0]
+        moved = self.base.entries.filter(classroom=closed, is_fixed=False).count()
+        Classroom.objects.filter(pk=closed.pk).update(is_available=False)
+
+        result = generate(repair=True, time_limit=1, force=True)
+
+        self.assertGreater(moved, 0)
+        self.assertLessEqual(result.changed_cells, moved)
+        self.assertNotIn(closed.pk, [entry.classroom_id for entry in result.entries])
+        self.assertEqual(result.conflicted, 0)
+
+    def test_scoped_version_copies_other_sections(self):
+        columns = ('section', 'subject', 'classroom', 'faculty', 'timeslot', 'day', 'is_fixed')
+        other = self.sections[0]
+
+        version = save_result(generate(section_ids={self.sections[1].pk}, time_limit=0, force=True))
+
+        self.assertEqual(version.entries.count(), 2 * 20)
+        self.assertEqual(
+            set(version.entries.filter(section=other).values_list(*columns)),
+            set(self.base.entries.filter(section=other).values_list(*columns)),
+        )
+
+    def test_clean_scoped_run_skips_the_search(self):
+        started = time.monotonic()
+        result = generate(section_ids={self.sections[1].pk}, time_limit=30, force=True)
+
+        self.assertLess(time.monotonic() - started, 5)
+        self.assertEqual(result.conflicted, 0)
+        self.assertEqual(len(result.entries), 20)
+
+
+class ResultCacheTests(SolverFixture):
+
+    def setUp(self):
+        self.version = save_result(generate(time_limit=0))
+
+    def test_hit_reuses_saved_version(self):
+        result = generate(time_limit=0)
+
+        self.assertTrue(result.from_cache)
+        with self.assertNumQueries(2):
+            self.assertEqual(save_result(result), self.version)
+        self.assertEqual(TimetableVersion.objects.count(), 1)
+
+    def test_hit_saves_a_copy_once_the_version_is_gone(self):
+        entries = self.version.entries.count()
+        self.version.delete()
+
+        result = generate(time_limit=0)
+        version = save_result(result)
+
+        self.assertTrue(result.from_cache)
+        self.assertEqual(version.entries.count(), entries)
+        self.assertEqual(save_result(generate(time_limit=0)), version)
+
+    def test_changed_inputs_miss(self):
+        Subject.objects.filter(pk=self.subjects[0].pk).update(classes_per_week=4)
+
+        self.assertFalse(generate(time_limit=0).from_cache)
+
+    def test_force_solves_again(self):
+        result = generate(time_limit=0, force=True)
+
+        self.assertFalse(result.from_cache)
+        self.assertNotEqual(save_result(result), self.version)
+
+    def test_parallel_runs_have_their_own_key(self):
+        self.assertFalse(generate(time_limit=0, workers=2).from_cache)
+
+
+class ParallelTests(TestCase):
+    """Two departments of two sections competing for five rooms."""
+
+    @classmethod
+    def setUpTestData(cls):
+        semester = Semester.objects.create(number=1, academic_year="2025-26")
+        for code in ('CSE', 'ECE'):
+            department = Department.objects.create(name=code, code=code)
+            for name in 'AB':
+                Section.objects.create(name=name, semester=semester, department=department, student_count=45)
+            Subject.objects.create(name="Lab", code=f"{code}-L", department=department, semester=semester,
+                                   subject_type='lab', classes_per_week=2)
+            for n in range(1, 5):
+                Subject.objects.create(name=f"Theory {n}", code=f"{code}-T{n}", department=department,
+                                       semester=semester, classes_per_week=5)
+            for n in range(3):
+                user = User.objects.create_user(email=f"{code.lower()}{n}@example.com", password="x", role='faculty')
+                Faculty.objects.create(user=user, department=department, designation="Lecturer",
+                                       employee_id=f"{code}{n}")
+        for n in range(3):
+            Classroom.objects.create(name=f"LH-{n}", capacity=50 + n)
+        for n in range(2):
+            Classroom.objects.create(name=f"LAB-{n}", capacity=60, room_type='lab')
+        for day in DAYS:
+            for hour in (9, 10, 11, 13):
+                TimeSlot.objects.create(day=day, start_time=datetime.time(hour), end_time=datetime.time(hour, 55))
+
+    def assertNoClashes(self, placements):
+        for column in (0, 2, 3):  # section, room, faculty
+            cells = [(placement[4], placement[column]) for placement in placements]
+            self.assertEqual(len(cells), len(set(cells)))
+
+    def test_parallel_run_has_no_clashes(self):
+        result = generate(workers=2, time_limit=0, force=True)
+
+        self.assertEqual(result.conflicted, 0)
+        self.assertEqual(len(result.entries), result.required_slots)
+        booked = {(entry.timeslot_id, entry.classroom_id) for entry in result.entries}
+        self.assertEqual(len(booked), len(result.entries))
+
+    def test_merge_never_double_books(self):
+        # Solved without room quotas, both departments take the same rooms
+        problem = compile_problem()
+        departments = [
+            _place_sections(problem, [s for s in problem.scope if problem.section_department[s] == department])
+            for department in (0, 1)
+        ]
+        colliding = {(p[4], p[2]) for p in departments[0]} & {(p[4], p[2]) for p in departments[1]}
+        self.assertTrue(colliding)
+
+        merged = _merge_departments(problem, departments)
+
+        self.assertNoClashes(merged)
+        self.assertEqual(conflict_count(problem, merged), 0)
+        self.assertGreater(len(merged), len(departments[0]))
+
+
+class ValidationTests(SolverFixture):
+
+    def entry(self, version, section, subject, room, faculty, day, hour):
+        return TimetableEntry.objects.create(version=version, section=section, subject=subject, classroom=room,
+                                             faculty=faculty, day=day.capitalize(), timeslot=self.slots[day, hour])
+
+    def test_reports_every_hard_rule(self):
+        version = TimetableVersion.objects.create()
+        a, b = self.sections
+        Faculty.objects.filter(pk=self.faculty[2].pk).update(max_classes_per_day=1)
+        self.entry(version, a, self.subjects[0], self.rooms[0], self.faculty[0], 'monday', 9)   # marked busy
+        self.entry(version, a, self.subjects[1], self.rooms[0], self.faculty[2], 'tuesday', 9)
+        self.entry(version, a, self.subjects[2], self.rooms[0], self.faculty[2], 'tuesday', 10)  # second that day
+        self.entry(version, b, self.lab, self.rooms[1], self.faculty[1], 'tuesday', 10)          # lab in a classroom
+        self.entry(version, b, self.subjects[3], self.small, self.faculty[1], 'tuesday', 11)     # too small
+
+        report = validate_timetable(version=version)
+
+        self.assertEqual(report.clash_count, 0)
+        self.assertEqual(report.capacity_count, 1)
+        self.assertEqual(report.unavailable_count, 1)
+        self.assertEqual(report.unavailable[0]['faculty'], 'teacher0@example.com')
+        self.assertEqual(report.overload_count, 1)
+        self.assertEqual(report.overload[0]['day'], 'Tuesday')
+        self.assertEqual(report.room_type_count, 1)
+        self.assertEqual(report.problem_count, 4)
+
+    def test_counts_clashes_per_extra_booking(self):
+        version = TimetableVersion.objects.create()
+        a, b = self.sections
+        self.entry(version, a, self.subjects[0], self.rooms[0], self.faculty[1], 'friday', 9)
+        self.entry(version, b, self.subjects[1], self.rooms[0], self.faculty[2], 'friday', 9)
+
+        report = validate_timetable(version=version)
+
+        self.assertEqual(report.clash_count, 1)
+        self.assertEqual(report.clashes['room'][0]['resource'], 'LH-0')
+        self.assertFalse(report.is_valid)
+
+    def test_follows_configured_rules(self):
+        version = TimetableVersion.objects.create()
+        a, b = self.sections
+        self.entry(version, a, self.subjects[0], self.rooms[0], self.faculty[1], 'friday', 9)
+        self.entry(version, b, self.subjects[1], self.rooms[0], self.faculty[2], 'friday', 9)   # room clash
+        self.entry(version, a, self.lab, self.labs[0], self.faculty[1], 'friday', 10)
+        self.entry(version, a, self.lab, self.labs[0], self.faculty[1], 'friday', 11)           # second lab
+        self.entry(version, b, self.subjects[2], self.small, self.faculty[2], 'friday', 10)     # too small
+        self.assertEqual(validate_timetable(version=version).lab_timing_count, 0)  # opt-in
+
+        ConstraintRule.objects.create(rule_type='lab_timing')
+        ConstraintRule.objects.create(rule_type='room_clash', is_mandatory=False)
+        ConstraintRule.objects.create(rule_type='capacity_check', is_mandatory=False)
+
+        report = validate_timetable(version=version)
+
+        self.assertEqual(report.lab_timing_count, 1)
+        self.assertEqual(report.lab_timing[0], {'day': 'Friday', 'section': 'A', 'labs': 2})
+        self.assertEqual(report.soft_kinds, {'room', 'capacity'})
+        self.assertEqual(report.soft_count, 2)
+        self.assertEqual(report.problem_count, 1)
+
+
+class AnalyticsTests(SolverFixture):
+
+    def setUp(self):
+        version = TimetableVersion.objects.create()
+        a, b = self.sections
+        teacher = self.faculty[1]
+        for section, day, hour in [(a, 'monday', 9), (a, 'monday', 13), (b, 'tuesday', 10), (b, 'tuesday', 10)]:
+            TimetableEntry.objects.create(version=version, section=section, subject=self.subjects[0],
+                                          classroom=self.rooms[0], faculty=teacher, day=day.capitalize(),
+                                          timeslot=self.slots[day, hour])
+        with self.assertNumQueries(2):
+            self.tensor = build_tensor(version.entries.select_related('timeslot'))
+
+    def test_lays_out_periods_and_teaching_cells(self):
+        tensor = self.tensor
+
+        self.assertEqual(tensor.periods, [datetime.time(hour) for hour in (9, 10, 11, 13)])
+        self.assertEqual(tensor.teaching_periods, 20)  # five days of four periods, breaks excluded
+        self.assertFalse(tensor.teaching[5].any())     # no Saturday slots
+        self.assertEqual(tensor.faculty.shape, (1, 6, 4))
+        self.assertEqual(tensor.sections.shape, (2, 6, 4))
+
+    def test_reductions(self):
+        faculty = self.tensor.faculty
+
+        self.assertEqual(utilization(faculty, self.tensor.teaching_periods).tolist(), [15.0])  # 3 of 20 busy
+        self.assertEqual(daily_load(faculty)[0].tolist(), [2, 2, 0, 0, 0, 0])
+        self.assertEqual(idle_gaps(faculty)[0].tolist(), [2, 0, 0, 0, 0, 0])
+        self.assertEqual(heatmap(self.tensor.rooms)[1].tolist(), [0, 2, 0, 0])  # the double-booked cell
+
+
+class GridTests(SolverFixture):
+
+    def test_shows_the_last_entry_of_each_cell(self):
+        version = TimetableVersion.objects.create()
+        entries = [
+            TimetableEntry.objects.create(version=version, section=section, subject=self.subjects[0],
+                                          classroom=self.rooms[0], faculty=self.faculty[1], day='Tuesday',
+                                          timeslot=self.slots['tuesday', 10])
+            for section in self.sections
+        ]
+
+        with self.assertNumQueries(2):
+            rows = grid_rows(version)
+        with self.assertNumQueries(2):
+            section_rows = grid_rows(version, self.sections[0].pk)
+
+        self.assertEqual([row['slot']['start_time'].hour for row in rows], [9, 10, 11, 12, 13])
+        self.assertEqual(rows[1]['cells'][1], entries[1])
+        self.assertEqual(section_rows[1]['cells'][1], entries[0])
+        self.assertEqual(sum(cell is not None for row in rows for cell in row['cells']), 1)
+
+
+class RenderRevisionTests(SolverFixture):
+
+    def assertBumps(self, change, bumps=True):
+        before = render_revision()
+        change()
+        (self.assertNotEqual if bumps else self.assertEqual)(render_revision(), before)
+
+    def test_admin_deletes_bump(self):
+        version = TimetableVersion.objects.create()
+        entry = TimetableEntry.objects.create(version=version, section=self.sections[0], subject=self.subjects[0],
+                                              classroom=self.rooms[0], faculty=self.faculty[1], day='Friday',
+                                              timeslot=self.slots['friday', 9])
+        entry_admin = TimetableEntryAdmin(TimetableEntry, admin.site)
+
+        self.assertBumps(lambda: entry_admin.delete_model(None, entry))
+        self.assertBumps(lambda: entry_admin.delete_queryset(None, TimetableEntry.objects.all()))
+
+    def test_email_changes_bump_but_logins_do_not(self):
+        user = self.faculty[0].user
+
+        def change_email():
+            user.email = 'renamed@example.com'
+            user.save()
+
+        def log_in():
+            user.login_count += 1
+            user.save(update_fields=['login_count'])
+
+        self.assertBumps(change_email)
+        self.assertBumps(log_in, bumps=False)
+
+
+class ActiveRulesTests(TestCase):
+
+    def test_every_default_rule_is_hard_without_rows(self):
+        self.assertEqual(active_rules(), {'room_clash': HARD, 'faculty_clash': HARD, 'capacity_check': HARD})
+
+    def test_a_row_only_affects_its_own_rule(self):
+        ConstraintRule.objects.create(rule_type='lab_timing')
+        ConstraintRule.objects.create(rule_type='room_clash', is_mandatory=False)
+
+        self.assertEqual(active_rules(), {
+            'room_clash': SOFT, 'faculty_clash': HARD, 'capacity_check': HARD, 'lab_timing': HARD,
+        })
+
+
+class PublishTests(TestCase):
+
+    def test_publish_archives_previous_version(self):
+        first, second = TimetableVersion.objects.create(), TimetableVersion.objects.create()
+        first.publish()
+        second.publish()
+
+        first.refresh_from_db()
+        second.refresh_from_db()
+        self.assertEqual(first.status, 'archived')
+        self.assertEqual(second.status, 'published')
+        self.assertIsNotNone(second.published_at)
+        self.assertEqual(TimetableVersion.published(), second)
+
+    def test_publish_sends_signal_after_commit(self):
+        received = []
+
+        def receiver(sender, version, **kwargs):
+            received.append(version)
+
+        timetable_published.connect(receiver)
+        self.addCleanup(timetable_published.disconnect, receiver)
+        version = TimetableVersion.objects.create()
+
+        with self.captureOnCommitCallbacks(execute=True):
+            version.publish()
+            self.assertEqual(received, [])
+        self.assertEqual(received, [version])
+
+
+@override_settings(TIMETABLE_JOB_TIMEOUT=60)
+class JobQueueTests(TestCase):
+
+    def running(self, seconds_ago):
+        updated = timezone.now() - datetime.timedelta(seconds=seconds_ago)
+        return GenerationJob.objects.create(status='running', phase='solving', started_at=updated, updated_at=updated)
+
+    def test_claims_oldest_queued_job_once(self):
+        first, second = jobs.enqueue(), jobs.enqueue()
+
+        claimed = jobs.claim_next_job()
+
+        self.assertEqual(claimed, first)
+        self.assertEqual(claimed.status, 'running')
+        self.assertIsNotNone(claimed.updated_at)
+        self.assertEqual(jobs.claim_next_job(), second)
+        self.assertIsNone(jobs.claim_next_job())
+
+    def test_idle_poll_does_not_write(self):
+        stale = self.running(seconds_ago=120)
+
+        with self.assertNumQueries(1):
+            self.assertIsNone(jobs.claim_next_job())
+        stale.refresh_from_db()
+        self.assertEqual(stale.status, 'running')
+
+    def test_claiming_fails_abandoned_jobs(self):
+        stale, live = self.running(seconds_ago=120), self.running(seconds_ago=5)
+        jobs.enqueue()
+
+        jobs.claim_next_job()
+
+        stale.refresh_from_db()
+        live.refresh_from_db()
+        self.assertEqual(stale.status, 'failed')
+        self.assertIsNotNone(stale.finished_at)
+        self.assertEqual(live.status, 'running')
+
+    def test_active_jobs_skip_abandoned_jobs(self):
+        self.running(seconds_ago=120)
+        live = self.running(seconds_ago=5)
+        queued = jobs.enqueue()
+
+        self.assertEqual(set(jobs.active_jobs()), {live, queued})
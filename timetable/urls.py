@@ -4,7 +4,13 @@ from . import views
 urlpatterns = [
     # The 'name' here must match what is in your {% url '...' %} tags
     path('generate/', views.generate_timetable, name='generate_timetable'),
+    path('jobs/<int:job_id>/', views.generation_job_view, name='generation_job'),
+    path('jobs/<int:job_id>/status/', views.generation_job_status, name='generation_job_status'),
+    path('jobs/<int:job_id>/events/', views.generation_job_events, name='generation_job_events'),
+    path('validate/', views.validation_report_view, name='validation_report'),
+    path('validate/json/', views.validation_report_json, name='validation_report_json'),
     path('view/', views.timetable_grid_view, name='timetable_view'),
+    path('versions/', views.timetable_versions, name='timetable_versions'),
     path('publish/', views.publish_timetable, name='publish_timetable'),
     path('export/pdf/<int:section_id>/', views.export_timetable_pdf, name='export_timetable_pdf'),
     path('public/', views.public_timetable_view, name='public_timetable'),
@@ -0,0 +1,300 @@
+"""
+Whole-timetable validation done in the database.
+
+Clashes are found with one ``GROUP BY ... HAVING COUNT(*) > 1`` query per
+resource (room, faculty, section) over ``(day, timeslot, resource)``, which
+the composite indexes on :class:`TimetableEntry` cover, and capacity
+violations with a single join against the room and the section. The other
+rules the solver treats as hard get one query each: faculty booked in a
+period they marked busy (an ``EXISTS`` against the availability matrix),
+faculty over their daily or weekly class limit (``GROUP BY ... HAVING``) and
+lab subjects outside a lab. Names are looked up afterwards for the reported
+rows only, so the cost does not depend on how many entries are valid.
+
+Categories that have a ``ConstraintRule`` type (room and faculty clashes,
+capacity, lab timing) follow :func:`~timetable.constraints.active_rules`
+like the solver does: an inactive rule is not checked, and a rule marked not
+mandatory is reported as soft and left out of :attr:`ValidationReport.problem_count`.
+The other categories are hard for the solver whatever is configured.
+"""
+from django.db.models import Count, Exists, F, OuterRef
+from django.db.models.functions import Lower
+
+from core.models import Section, Classroom
+from scheduler.models import TimeSlot
+from faculty.models import Faculty, FacultyAvailability
+from .constraints import HARD, active_rules
+from .models import TimetableEntry, TimetableVersion
+
+CLASH_KINDS = [
+    ('room', 'classroom_id'),
+    ('faculty', 'faculty_id'),
+    ('section', 'section_id'),
+]
+
+# Report category -> ConstraintRule type; categories not listed are always hard
+CATEGORY_RULES = {
+    'room': 'room_clash',
+    'faculty': 'faculty_clash',
+    'capacity': 'capacity_check',
+    'lab_timing': 'lab_timing',
+}
+
+
+class ValidationReport:
+    """Hard-rule violations found in the stored timetable.
+
+    ``clashes`` maps each checked kind to rows of ``{'day', 'time', 'resource', 'count'}``;
+    ``capacity`` rows are ``{'day', 'time', 'room', 'section', 'capacity', 'students'}``,
+    ``unavailable`` rows ``{'day', 'time', 'faculty', 'section'}``, ``overload``
+    rows ``{'faculty', 'day', 'classes', 'limit'}`` (``day`` is ``None`` for the
+    weekly limit), ``room_type`` rows ``{'day', 'time', 'room', 'section'}`` and
+    ``lab_timing`` rows ``{'day', 'section', 'labs'}``. ``rules`` are the
+    active rule weights the report was checked against.
+    """
+
+    def __init__(self, version, total_entries, rules, clashes, clash_counts, capacity, capacity_count,
+                 unavailable, unavailable_count, overload, overload_count, room_type, room_type_count,
+                 lab_timing, lab_timing_count):
+        self.version = version
+        self.total_entries = total_entries
+        self.rules = rules
+        self.clashes = clashes
+        self.clash_counts = clash_counts
+        self.capacity = capacity
+        self.capacity_count = capacity_count
+        self.unavailable = unavailable
+        self.unavailable_count = unavailable_count
+        self.overload = overload
+        self.overload_count = overload_count
+        self.room_type = room_type
+        self.room_type_count = room_type_count
+        self.lab_timing = lab_timing
+        self.lab_timing_count = lab_timing_count
+
+    @property
+    def clash_count(self):
+        return sum(self.clash_counts.values())
+
+    @property
+    def faculty_count(self):
+        """Busy-period bookings plus classes over a daily or weekly limit."""
+        return self.unavailable_count + self.overload_count
+
+    @property
+    def soft_kinds(self):
+        """Categories whose rule is configured as not mandatory."""
+        return {category for category, rule_type in CATEGORY_RULES.items()
+                if rule_type in self.rules and self.rules[rule_type] < HARD}
+
+    def _category_counts(self):
+        yield from self.clash_counts.items()
+        yield 'capacity', self.capacity_count
+        yield 'unavailable', self.unavailable_count
+        yield 'overload', self.overload_count
+        yield 'room_type', self.room_type_count
+        yield 'lab_timing', self.lab_timing_count
+
+    @property
+    def problem_count(self):
+        """Violations of the rules the solver treats as hard."""
+        soft = self.soft_kinds
+        return sum(count for category, count in self._category_counts() if category not in soft)
+
+    @property
+    def soft_count(self):
+        """Violations of rules configured as not mandatory."""
+        soft = self.soft_kinds
+        return sum(count for category, count in self._category_counts() if category in soft)
+
+    @property
+    def is_valid(self):
+        return not self.problem_count
+
+    def as_dict(self):
+        return {
+            'version': self.version.pk if self.version else None,
+            'is_valid': self.is_valid,
+            'total_entries': self.total_entries,
+            'clash_count': self.clash_count,
+            'capacity_violations': self.capacity_count,
+            'unavailable_violations': self.unavailable_count,
+            'overload_violations': self.overload_count,
+            'room_type_violations': self.room_type_count,
+            'lab_timing_violations': self.lab_timing_count,
+            'soft_violations': self.soft_count,
+            'rules': self.rules,
+            'clashes': self.clashes,
+            'capacity': self.capacity,
+            'unavailable': self.unavailable,
+            'overload': self.overload,
+            'room_type': self.room_type,
+            'lab_timing': self.lab_timing,
+        }
+
+
+def validate_timetable(version=None, limit=None):
+    """Check one timetable version and return a :class:`ValidationReport`.
+
+    ``version`` defaults to the published version. ``limit`` caps the rows
+    reported per category (counts stay exact).
+    """
+    if version is None:
+        version = TimetableVersion.published()
+    entries = TimetableEntry.objects.filter(version=version).order_by()
+    total_entries = entries.count()
+    rules = active_rules()
+
+    def checked(category):
+        return category not in CATEGORY_RULES or CATEGORY_RULES[category] in rules
+
+    raw_clashes = {}
+    for kind, column in CLASH_KINDS:
+        if not checked(kind):
+            continue
+        rows = (
+            entries
+            .filter(**{f'{column}__isnull': False})
+            .values('day', 'timeslot_id', column)
+            .annotate(count=Count('id'))
+            .filter(count__gt=1)
+            .order_by('day', 'timeslot_id', column)
+        )
+        raw_clashes[kind] = [(row['day'], row['timeslot_id'], row[column], row['count']) for row in rows]
+
+    raw_capacity = list(
+        entries
+        .filter(classroom__capacity__lt=F('section__student_count'))
+        .order_by('day', 'timeslot_id', 'classroom_id')
+        .values_list('day', 'timeslot_id', 'classroom_id', 'section_id',
+                     'classroom__capacity', 'section__student_count')
+    ) if checked('capacity') else []
+
+    # TimetableEntry.day is the display name, the availability matrix stores the choice value
+    busy = FacultyAvailability.objects.filter(
+        faculty_id=OuterRef('faculty_id'), is_available=False,
+        day=Lower(OuterRef('day')), start_time=OuterRef('timeslot__start_time'),
+    )
+    raw_unavailable = list(
+        entries
+        .filter(Exists(busy))
+        .order_by('day', 'timeslot_id', 'faculty_id')
+        .values_list('day', 'timeslot_id', 'faculty_id', 'section_id')
+    )
+
+    raw_overload = [
+        (faculty_pk, day, classes, max_per_day)
+        for faculty_pk, day, max_per_day, classes in (
+            entries
+            .filter(faculty__isnull=False)
+            .values_list('faculty_id', 'day', 'faculty__max_classes_per_day')
+            .annotate(classes=Count('id'))
+            .filter(classes__gt=F('faculty__max_classes_per_day'))
+            .order_by('faculty_id', 'day')
+        )
+    ] + [
+        (faculty_pk, None, classes, max_per_week)
+        for faculty_pk, max_per_week, classes in (
+            entries
+            .filter(faculty__isnull=False)
+            .values_list('faculty_id', 'faculty__max_classes_per_week')
+            .annotate(classes=Count('id'))
+            .filter(classes__gt=F('faculty__max_classes_per_week'))
+            .order_by('faculty_id')
+        )
+    ]
+
+    raw_room_type = list(
+        entries
+        .filter(subject__subject_type='lab')
+        .exclude(classroom__room_type='lab')
+        .order_by('day', 'timeslot_id', 'classroom_id')
+        .values_list('day', 'timeslot_id', 'classroom_id', 'section_id')
+    )
+
+    # At most one lab session per section and day
+    raw_lab_timing = list(
+        entries
+        .filter(subject__subject_type='lab')
+        .values_list('day', 'section_id')
+        .annotate(labs=Count('id'))
+        .filter(labs__gt=1)
+        .order_by('day', 'section_id')
+    ) if checked('lab_timing') else []
+
+    # Each extra booking of a (day, slot, resource) is one clash, and each
+    # class over a limit one overload
+    clash_counts = {kind: sum(row[3] - 1 for row in rows) for kind, rows in raw_clashes.items()}
+    capacity_count = len(raw_capacity)
+    unavailable_count = len(raw_unavailable)
+    overload_count = sum(classes - max_classes for _, _, classes, max_classes in raw_overload)
+    room_type_count = len(raw_room_type)
+    lab_timing_count = sum(labs - 1 for _, _, labs in raw_lab_timing)
+    if limit is not None:
+        raw_clashes = {kind: rows[:limit] for kind, rows in raw_clashes.items()}
+        raw_capacity = raw_capacity[:limit]
+        raw_unavailable = raw_unavailable[:limit]
+        raw_overload = raw_overload[:limit]
+        raw_room_type = raw_room_type[:limit]
+        raw_lab_timing = raw_lab_timing[:limit]
+
+    # Labels for the reported rows only
+    slot_ids = {row[1] for rows in raw_clashes.values() for row in rows} | {row[1] for row in raw_capacity} \
+        | {row[1] for row in raw_unavailable} | {row[1] for row in raw_room_type}
+    times = {
+        pk: start_time.strftime('%H:%M')
+        for pk, start_time in TimeSlot.objects.filter(id__in=slot_ids).values_list('id', 'start_time')
+    }
+    rooms = _names(Classroom, {row[2] for row in raw_clashes.get('room', ())} | {row[2] for row in raw_capacity}
+                   | {row[2] for row in raw_room_type})
+    faculty = {
+        pk: email
+        for pk, email in Faculty.objects.filter(
+            id__in={row[2] for row in raw_clashes.get('faculty', ())} | {row[2] for row in raw_unavailable}
+            | {row[0] for row in raw_overload}
+        ).values_list('id', 'user__email')
+    }
+    sections = _names(Section, {row[2] for row in raw_clashes['section']} | {row[3] for row in raw_capacity}
+                      | {row[3] for row in raw_unavailable} | {row[3] for row in raw_room_type}
+                      | {row[1] for row in raw_lab_timing})
+    labels = {'room': rooms, 'faculty': faculty, 'section': sections}
+
+    clashes = {
+        kind: [
+            {'day': day, 'time': times.get(slot_id), 'resource': labels[kind].get(pk, pk), 'count': count}
+            for day, slot_id, pk, count in rows
+        ]
+        for kind, rows in raw_clashes.items()
+    }
+    capacity = [
+        {
+            'day': day, 'time': times.get(slot_id), 'room': rooms.get(room_pk, room_pk),
+            'section': sections.get(section_pk, section_pk), 'capacity': room_capacity, 'students': students,
+        }
+        for day, slot_id, room_pk, section_pk, room_capacity, students in raw_capacity
+    ]
+    unavailable = [
+        {'day': day, 'time': times.get(slot_id), 'faculty': faculty.get(faculty_pk, faculty_pk),
+         'section': sections.get(section_pk, section_pk)}
+        for day, slot_id, faculty_pk, section_pk in raw_unavailable
+    ]
+    overload = [
+        {'faculty': faculty.get(faculty_pk, faculty_pk), 'day': day, 'classes': classes, 'limit': max_classes}
+        for faculty_pk, day, classes, max_classes in raw_overload
+    ]
+    room_type = [
+        {'day': day, 'time': times.get(slot_id), 'room': rooms.get(room_pk, room_pk),
+         'section': sections.get(section_pk, section_pk)}
+        for day, slot_id, room_pk, section_pk in raw_room_type
+    ]
+    lab_timing = [
+        {'day': day, 'section': sections.get(section_pk, section_pk), 'labs': labs}
+        for day, section_pk, labs in raw_lab_timing
+    ]
+    return ValidationReport(version, total_entries, rules, clashes, clash_counts, capacity, capacity_count,
+                            unavailable, unavailable_count, overload, overload_count, room_type, room_type_count,
+                            lab_timing, lab_timing_count)
+
+
+def _names(model, ids):
+    return dict(model.objects.filter(id__in=ids).values_list('id', 'name'))
@@ -1,15 +1,26 @@
 from django.shortcuts import render, redirect, get_object_or_404
+from django.template.loader import render_to_string
 from django.contrib.auth.decorators import login_required
 from django.contrib import messages
-from django.http import HttpResponse
-from django.db import transaction
+from django.http import HttpResponse, JsonResponse, StreamingHttpResponse
+from django.conf import settings
+from django.core.cache import cache
+from django.db.models import Count
+from django.utils.cache import get_conditional_response, patch_cache_control, patch_vary_headers
+from django.utils.http import http_date, quote_etag
+import hashlib
+import io
+import json
+import time
 
 # Model Imports
-from core.models import Section, Subject, Classroom
-from scheduler.models import TimeSlot
+from core.models import Section, Department
 from faculty.models import Faculty
 from notifications.models import Notification
-from .models import TimetableEntry
+from .models import TimetableEntry, TimetableVersion, GenerationJob
+from .validation import validate_timetable
+from .grid import DAYS, grid_rows, render_cache_key, last_modified
+from . import jobs
 
 # PDF Generation
 from reportlab.lib import colors
@@ -28,173 +39,155 @@ def generate_timetable(request):
         return redirect('user_dashboard')
 
     if request.method == 'POST':
-        with transaction.atomic():
-
-            TimetableEntry.objects.all().delete()
-
-            sections = Section.objects.all()
-            classrooms = list(Classroom.objects.filter(is_available=True))
-            faculty_members = list(Faculty.objects.all())
-
-            days = ['Monday', 'Tuesday', 'Wednesday', 'Thursday', 'Friday', 'Saturday']
-
-            for section in sections:
-
-                subjects = list(
-                    Subject.objects.filter(
-                        semester=section.semester,
-                        department=section.department
-                    )
-                )
-
-                # Track subject weekly usage
-                subject_usage = {s.id: 0 for s in subjects}
-
-                for day in days:
-
-                    previous_subject = None
-
-                    slots = TimeSlot.objects.filter(
-                        day=day,
-                        is_break=False
-                    ).order_by('start_time')
-
-                    for slot in slots:
-
-                        assigned = False
-
-                        # Try subjects in rotation
-                        for subject in subjects:
-
-                            # Avoid consecutive same subject
-                            if previous_subject == subject.id:
-                                continue
-
-                            # Respect weekly count but allow reuse if necessary
-                            if subject_usage[subject.id] >= subject.classes_per_week:
-                                continue
-
-                            # Room allocation
-                            room = None
-                            for r in classrooms:
-                                if subject.code.endswith("L"):
-                                    if "Lab" not in r.name:
-                                        continue
-                                if r.capacity >= section.student_count:
-                                    if not TimetableEntry.objects.filter(
-                                        classroom=r,
-                                        day=day,
-                                        timeslot=slot
-                                    ).exists():
-                                        room = r
-                                        break
-
-                            if not room:
-                                continue
-
-                            # Faculty allocation
-                            faculty_member = None
-                            for f in faculty_members:
-                                if f.department != subject.department:
-                                    continue
-                                if not TimetableEntry.objects.filter(
-                                    faculty=f,
-                                    day=day,
-                                    timeslot=slot
-                                ).exists():
-                                    faculty_member = f
-                                    break
-
-                            if not faculty_member:
-                                continue
-
-                            # Create entry
-                            TimetableEntry.objects.create(
-                                subject=subject,
-                                section=section,
-                                classroom=room,
-                                faculty=faculty_member,
-                                timeslot=slot,
-                                day=day
-                            )
-
-                            subject_usage[subject.id] += 1
-                            previous_subject = subject.id
-                            assigned = True
-                            break
-
-                        # If no subject fits (all exhausted), rotate again ignoring weekly limit
-                        if not assigned:
-                            for subject in subjects:
-
-                                if previous_subject == subject.id:
-                                    continue
-
-                                room = classrooms[0]
-                                faculty_member = faculty_members[0]
-
-                                TimetableEntry.objects.create(
-                                    subject=subject,
-                                    section=section,
-                                    classroom=room,
-                                    faculty=faculty_member,
-                                    timeslot=slot,
-                                    day=day
-                                )
-
-                                previous_subject = subject.id
-                                assigned = True
-                                break
-
-            # FINAL VALIDATION
-            total_required_slots = TimeSlot.objects.filter(is_break=False).count() * sections.count()
-            total_created = TimetableEntry.objects.count()
-
-            if total_created >= total_required_slots:
-                messages.success(request, "Complete Full-Week Timetable Generated Successfully.")
-            else:
-                messages.warning(request, "Timetable generated but some slots could not be filled.")
+        # Empty scope fields mean a full rebuild
+        section_id = request.POST.get('section')
+        department_id = request.POST.get('department')
+        section = get_object_or_404(Section, id=section_id) if section_id else None
+        department = get_object_or_404(Department, id=department_id) if department_id else None
+        time_limit = request.POST.get('time_limit')
+        time_limit = int(time_limit) if time_limit and time_limit.isdigit() else None
+        force = request.POST.get('force') == 'on'
+        repair = request.POST.get('repair') == 'on'
+
+        # The worker process (manage.py run_generation_worker) picks this up
+        job = jobs.enqueue(request.user, section=section, department=department, time_limit=time_limit, force=force,
+                           repair=repair)
+        messages.success(request, "Timetable generation has been queued.")
+        return redirect('generation_job', job_id=job.id)
+
+    return render(request, 'timetable/generate_confirm.html', {
+        'total_sections': Section.objects.count(),
+        'sections': Section.objects.select_related('department', 'semester'),
+        'departments': Department.objects.all(),
+        'default_time_limit': settings.TIMETABLE_OPTIMIZE_SECONDS,
+        'active_job': jobs.active_jobs().first(),
+    })
+
+
+@login_required
+def generation_job_view(request, job_id):
+    if request.user.role != 'admin':
+        return redirect('user_dashboard')
+
+    job = get_object_or_404(GenerationJob, id=job_id)
+    return render(request, 'timetable/generation_job.html', {'job': job})
 
-        return redirect('timetable_view')
 
-    return render(request, 'timetable/generate_confirm.html')
+@login_required
+def generation_job_status(request, job_id):
+    """JSON progress report polled by the job page."""
+    if request.user.role != 'admin':
+        return JsonResponse({'error': 'forbidden'}, status=403)
+
+    job = get_object_or_404(GenerationJob, id=job_id)
+    return JsonResponse(job.progress_payload())
+
+
+# Seconds between events, and events sent per stream. A synchronous (WSGI)
+# worker is tied up for the whole stream, so streams are kept short: once
+# one ends the browser's EventSource reconnects after the ``retry`` delay.
+JOB_EVENT_INTERVAL = 1
+JOB_EVENT_STREAM_EVENTS = 5
+
+
+@login_required
+def generation_job_events(request, job_id):
+    """Server-Sent Events stream of the job's progress.
+
+    Each stream sends ``JOB_EVENT_STREAM_EVENTS`` events (fewer if the job
+    finishes) and ends, so it holds a WSGI worker for a few seconds at most;
+    the client reconnects for the next batch. The worker throttles its
+    progress writes, so each event is one primary key lookup on the job row.
+    """
+    if request.user.role != 'admin':
+        return JsonResponse({'error': 'forbidden'}, status=403)
+
+    job = get_object_or_404(GenerationJob, id=job_id)
+
+    def stream():
+        yield f"retry: {JOB_EVENT_INTERVAL * 1000}\n\n"
+        for sent in range(1, JOB_EVENT_STREAM_EVENTS + 1):
+            job.refresh_from_db()
+            yield f"id: {job.pk}\ndata: {json.dumps(job.progress_payload())}\n\n"
+            if job.status in ('done', 'failed') or sent == JOB_EVENT_STREAM_EVENTS:
+                return
+            time.sleep(JOB_EVENT_INTERVAL)
+
+    response = StreamingHttpResponse(stream(), content_type='text/event-stream')
+    response['Cache-Control'] = 'no-cache'
+    response['X-Accel-Buffering'] = 'no'  # Stop nginx from buffering the stream
+    return response
 
 # ----------------------------------------------------------
-# GRID VIEW
+# VALIDATION REPORT
 # ----------------------------------------------------------
 
+# Rows listed per category; the totals are always exact
+VALIDATION_ROW_LIMIT = 200
+
+
+def _requested_version(request):
+    """The version named by ``?version=``, or None for the published one."""
+    version_id = request.GET.get('version')
+    if version_id and version_id.isdigit():
+        return get_object_or_404(TimetableVersion, id=version_id)
+    return None
+
+
 @login_required
-def timetable_grid_view(request):
+def validation_report_view(request):
+    if request.user.role != 'admin':
+        return redirect('user_dashboard')
+
+    report = validate_timetable(version=_requested_version(request), limit=VALIDATION_ROW_LIMIT)
+    return render(request, 'timetable/validation_report.html', {
+        'report': report,
+        'row_limit': VALIDATION_ROW_LIMIT,
+    })
 
-    days = ['Monday', 'Tuesday', 'Wednesday', 'Thursday', 'Friday', 'Saturday']
 
-    # Unique rows based ONLY on start_time
-    unique_timeslots = (
-        TimeSlot.objects
-        .order_by('start_time')
-        .values('start_time', 'end_time', 'is_break', 'break_name')
-        .distinct()
+@login_required
+def validation_report_json(request):
+    """The same report as JSON, for scripts and monitoring."""
+    if request.user.role != 'admin':
+        return JsonResponse({'error': 'forbidden'}, status=403)
+
+    limit = request.GET.get('limit')
+    report = validate_timetable(
+        version=_requested_version(request),
+        limit=int(limit) if limit and limit.isdigit() else VALIDATION_ROW_LIMIT,
     )
+    return JsonResponse(report.as_dict())
 
-    section_id = request.GET.get('section')
+# ----------------------------------------------------------
+# GRID VIEW
+# ----------------------------------------------------------
 
-    if section_id:
-        entries = TimetableEntry.objects.filter(section_id=section_id)
-    else:
-        entries = TimetableEntry.objects.all()
+@login_required
+def timetable_grid_view(request):
 
-    grid = {day: {} for day in days}
+    section_id = request.GET.get('section')
 
-    for entry in entries:
-        key = entry.timeslot.start_time.strftime('%H:%M')
-        grid[entry.day][key] = entry
+    # Admins can review drafts and archived versions; everyone else sees the published one
+    version = _requested_version(request) if request.user.role == 'admin' else None
+    if version is None:
+        version = TimetableVersion.published()
+
+    # The table is rendered from one joined query and cached per (section, version)
+    key = render_cache_key('grid', version, section_id)
+    grid_html = cache.get(key)
+    if grid_html is None:
+        grid_html = render_to_string('timetable/timetable_grid.html', {
+            'days': DAYS,
+            'rows': grid_rows(version, section_id),
+        })
+        cache.set(key, grid_html, settings.TIMETABLE_RENDER_CACHE_SECONDS)
 
     return render(request, 'timetable/timetable_view.html', {
-        'days': days,
-        'timeslots': unique_timeslots,
-        'grid': grid,
-        'sections': Section.objects.all(),
-        'selected_section': section_id
+        'grid_html': grid_html,
+        'sections': Section.objects.select_related('department'),
+        'selected_section': section_id,
+        'version': version,
     })
 
 
@@ -203,13 +196,26 @@ def timetable_grid_view(request):
 # ----------------------------------------------------------
 
 def export_timetable_pdf(request, section_id):
-
-    section = get_object_or_404(Section, id=section_id)
-
-    response = HttpResponse(content_type='application/pdf')
+    """The published timetable of one section as a PDF.
+
+    The document is built from one joined query and its bytes are cached
+    per (section, version), so a repeat download is a cache read, or a 304
+    when the browser already has this version.
+    """
+    section = get_object_or_404(Section.objects.select_related('department'), id=section_id)
+    version = TimetableVersion.published()
+
+    response = _cached_response(
+        request, render_cache_key('pdf', version, section.pk), version,
+        lambda: _timetable_pdf(section, version), content_type='application/pdf'
+    )
     response['Content-Disposition'] = f'attachment; filename="Timetable_{section.name}.pdf"'
+    return response
 
-    doc = SimpleDocTemplate(response, pagesize=landscape(A4))
+
+def _timetable_pdf(section, version):
+    buffer = io.BytesIO()
+    doc = SimpleDocTemplate(buffer, pagesize=landscape(A4))
     elements = []
     styles = getSampleStyleSheet()
 
@@ -222,35 +228,19 @@ def export_timetable_pdf(request, section_id):
 
     data = [['Time', 'Mon', 'Tue', 'Wed', 'Thu', 'Fri', 'Sat']]
 
-    times = (
-        TimeSlot.objects
-        .order_by('start_time')
-        .values('start_time', 'end_time', 'is_break', 'break_name')
-        .distinct()
-    )
-
-    for t in times:
-
-        time_str = t['start_time'].strftime('%H:%M')
-        row = [time_str]
+    for row in grid_rows(version, section.pk):
+        slot = row['slot']
+        cells = [slot['start_time'].strftime('%H:%M')]
 
-        for d in ['Monday', 'Tuesday', 'Wednesday', 'Thursday', 'Friday', 'Saturday']:
-
-            if t['is_break']:
-                row.append(t['break_name'] or "BREAK")
+        for entry in row['cells']:
+            if slot['is_break']:
+                cells.append(slot['break_name'] or "BREAK")
+            elif entry:
+                cells.append(f"{entry.subject.code}\n{entry.classroom.name}")
             else:
-                entry = TimetableEntry.objects.filter(
-                    section=section,
-                    day=d,
-                    timeslot__start_time=t['start_time']
-                ).first()
-
-                if entry:
-                    row.append(f"{entry.subject.code}\n{entry.classroom.name}")
-                else:
-                    row.append("-")
+                cells.append("-")
 
-        data.append(row)
+        data.append(cells)
 
     table = Table(data, hAlign='CENTER')
     table.setStyle(TableStyle([
@@ -263,20 +253,68 @@ def export_timetable_pdf(request, section_id):
 
     elements.append(table)
     doc.build(elements)
-
+    return buffer.getvalue()
+
+
+def _cached_response(request, key, version, build, content_type=None):
+    """Serve the bytes ``build()`` returns, cached under ``key``, as a conditional response.
+
+    The ETag is derived from ``key`` (which names the version and the
+    render revision) and Last-Modified from :func:`~timetable.grid.last_modified`;
+    a request that already has this rendering gets a 304 without touching
+    the cache.
+    """
+    etag = quote_etag(hashlib.md5(key.encode()).hexdigest())
+    modified = last_modified(version)
+
+    response = get_conditional_response(request, etag=etag, last_modified=int(modified.timestamp()))
+    if response is None:
+        content = cache.get(key)
+        if content is None:
+            content = build()
+            cache.set(key, content, settings.TIMETABLE_RENDER_CACHE_SECONDS)
+        response = HttpResponse(content, content_type=content_type)
+
+    response['ETag'] = etag
+    response['Last-Modified'] = http_date(modified.timestamp())
+    # Browsers revalidate on every visit, which costs a 304 while nothing changed
+    patch_cache_control(response, no_cache=True)
+    patch_vary_headers(response, ['Cookie'])
     return response
 
 
 # ----------------------------------------------------------
-# PUBLISH TIMETABLE
+# VERSIONS & PUBLISHING
 # ----------------------------------------------------------
 
+@login_required
+def timetable_versions(request):
+    if request.user.role != 'admin':
+        return redirect('user_dashboard')
+
+    versions = TimetableVersion.objects.select_related('created_by').annotate(entry_count=Count('entries'))
+    return render(request, 'timetable/version_list.html', {'versions': versions})
+
+
 @login_required
 def publish_timetable(request):
+    if request.user.role != 'admin':
+        return redirect('user_dashboard')
 
     if request.method == 'POST':
 
-        entries = TimetableEntry.objects.all()
+        # Publishing is a status swap: readers move to the new version at commit
+        version_id = request.POST.get('version')
+        if version_id:
+            version = get_object_or_404(TimetableVersion, id=version_id)
+        else:
+            version = TimetableVersion.objects.filter(status='draft').first() or TimetableVersion.published()
+        if version is None:
+            messages.error(request, "There is no timetable version to publish yet.")
+            return redirect('timetable_view')
+        version.publish()
+
+        entries = TimetableEntry.objects.filter(version=version)
 
         faculty_users = (
             Faculty.objects
@@ -292,30 +330,34 @@ def publish_timetable(request):
                 message="The final academic schedule is now live."
             )
 
-        messages.success(request, "Timetable published successfully.")
+        messages.success(request, f"Timetable version #{version.pk} published successfully.")
 
     return redirect('timetable_view')
 
 
 def public_timetable_view(request):
-    """A public, read-only view of the schedule for students/guests."""
-    days = ['Monday', 'Tuesday', 'Wednesday', 'Thursday', 'Friday', 'Saturday']
-    unique_timeslots = TimeSlot.objects.values('start_time', 'end_time', 'is_break', 'break_name').distinct().order_by('start_time')
-    
-    section_id = request.GET.get('section')
-    sections = Section.objects.all()
-    
-    grid = {day: {} for day in days}
-    if section_id:
-        entries_qs = TimetableEntry.objects.filter(section_id=section_id)
-        for entry in entries_qs:
-            time_key = entry.timeslot.start_time.strftime('%H:%M')
-            grid[entry.day][time_key] = entry
-
-    return render(request, 'timetable/public_view.html', {
-        'days': days,
-        'timeslots': unique_timeslots,
-        'grid': grid,
-        'sections': sections,
+    """A public, read-only view of the schedule for students/guests.
+
+    Every response carries an ETag and Last-Modified derived from the
+    published version and the render revision (see timetable.grid), so a
+    browser that already has the page gets a 304. Full pages are cached per
+    section, version and navigation variant (the header differs for
+    visitors, admins and other signed-in users).
+    """
+    section_id = request.GET.get('section', '')
+    if not section_id.isdigit():
+        section_id = ''
+
+    version = TimetableVersion.published()
+    if not request.user.is_authenticated:
+        viewer = 'guest'
+    else:
+        viewer = 'admin' if request.user.role == 'admin' else 'member'
+    key = f"{render_cache_key('public', version, section_id)}:{viewer}"
+
+    return _cached_response(request, key, version, lambda: render(request, 'timetable/public_view.html', {
+        'days': DAYS,
+        'rows': grid_rows(version, section_id) if section_id else [],
+        'sections': Section.objects.select_related('department'),
         'selected_section': section_id
-    })
\ No newline at end of file
+    }).content)